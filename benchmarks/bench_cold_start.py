@@ -0,0 +1,143 @@
+"""Cold-start benchmark for the API process.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cold_start --runs 3
+
+Measures how long `import main` takes in a fresh interpreter, then starts
+uvicorn in a subprocess against a local stub Ollama (benchmarks/stub_ollama.py)
+whose first request pays --load-latency, as a real model load does. For each
+run, with warm-up on and off, it records the seconds from spawning the
+process until the port answers, until /api/v1/ready returns 200, and until
+the first /api/v1/research response arrives, plus that request's own
+latency. With warm-up on, the first request is sent once the process reports
+ready; with it off, as soon as the port answers.
+
+Searches replay fixtures/search_results.json. Prints one JSON report of
+medians.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+import requests
+from .bench_offline import free_port, replay_search_fixtures
+from .stub_ollama import StubOllama
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_seconds() -> float:
+    """Time `import main` in a fresh interpreter"""
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"],
+        cwd=ROOT,
+        env=os.environ.copy()
+    )
+    return float(output.decode().strip().splitlines()[-1])
+
+def serve(port: int):
+    """Run the app with uvicorn, replaying search fixtures once the agent is built"""
+    import uvicorn
+    from src.api import routes
+    build = routes.research_agent.factory
+
+    def build_with_fixtures():
+        replay_search_fixtures()
+        return build()
+
+    routes.research_agent.factory = build_with_fixtures
+    uvicorn.run("main:app", host="127.0.0.1", port=port, log_level="warning")
+
+def wait_for(check, timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return time.perf_counter()
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError("server did not come up in time")
+
+def start_run(warmup: bool, timeout: float) -> Dict[str, float]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/v1"
+    env = dict(os.environ, WARMUP_ON_STARTUP=str(warmup).lower())
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--serve", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        session = requests.Session()
+        port_open = wait_for(lambda: session.get(url + "/ready", timeout=timeout) is not None, timeout)
+        ready = wait_for(lambda: session.get(url + "/ready", timeout=timeout).status_code == 200, timeout)
+        if warmup:
+            sent = ready
+        else:
+            sent = port_open
+        # A fresh connection: uvicorn 0.24 can arm its keep-alive timer on a
+        # connection that is already carrying the next request after tight polling
+        response = requests.post(url + "/research", json={"topic": "graph neural networks"}, timeout=timeout)
+        response.raise_for_status()
+        answered = time.perf_counter()
+        return {
+            "port_seconds": port_open - started,
+            "ready_seconds": ready - started,
+            "first_response_seconds": answered - started,
+            "first_request_latency": answered - sent
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    return {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="server starts per mode")
+    parser.add_argument("--load-latency", type=float, default=2.0, help="stub LLM seconds to load the model")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="stub LLM seconds per token")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each server")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            "VECTOR_DB_PATH": os.path.join(workdir, "vector_db"),
+            "LLM_CACHE_ENABLED": "false",
+            "SEARCH_CACHE_ENABLED": "false"
+        })
+        imports = [import_seconds() for _ in range(args.runs)]
+        modes = {}
+        for warmup in (True, False):
+            runs = []
+            for _ in range(args.runs):
+                # A fresh stub per run, so every server start pays the model load
+                with StubOllama(token_latency=args.token_latency, load_latency=args.load_latency) as stub:
+                    os.environ["OLLAMA_HOST"] = stub.url
+                    runs.append(start_run(warmup, args.timeout))
+            modes["warmup" if warmup else "no_warmup"] = summarize(runs)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "serve"},
+        "import_seconds": round(statistics.median(imports), 3),
+        "modes": modes
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
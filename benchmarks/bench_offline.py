@@ -0,0 +1,367 @@
+"""Offline end-to-end benchmark suite.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_offline --output report.json
+
+Nothing leaves the machine. LLM calls go to a local stub Ollama server
+(benchmarks/stub_ollama.py) with a configurable per-token latency. arXiv
+and Scholar searches replay fixtures/search_results.json, including their
+recorded latency, and embeddings are deterministic pseudo-vectors rather
+than a model's. A synthetic PDF corpus of several sizes runs through
+PDFParserTool, DocumentProcessor and the vector store. The FastAPI app is
+then served by uvicorn in a background thread, and /upload-paper and
+/research are driven over HTTP.
+
+Prints one JSON report. For each stage it gives p50/p95/p99 latency in
+milliseconds, operations (and pages or chunks) per second, and peak RSS of
+this process plus its worker processes. With --baseline, exits with status 1
+when any stage's p95 grew by more than --max-regression against an earlier
+report, so the suite can gate deploys.
+
+To replace the fixtures with fresh recordings (this needs network access):
+
+    python -m benchmarks.bench_offline --record-fixtures "transformer language models"
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+import requests
+from .stub_ollama import StubOllama
+from .synthetic_pdf import paper_pages, make_pdf
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "search_results.json")
+
+EMBEDDING_DIMENSION = 384
+
+def rss_bytes() -> int:
+    """Resident set size of this process and its direct children (Linux /proc)"""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    pids = ["self"]
+    for task in os.listdir("/proc/self/task"):
+        with contextlib.suppress(OSError), open(f"/proc/self/task/{task}/children") as children:
+            pids.extend(children.read().split())
+    total = 0
+    for pid in pids:
+        with contextlib.suppress(OSError, IndexError, ValueError), open(f"/proc/{pid}/statm") as statm:
+            total += int(statm.read().split()[1]) * page_size
+    return total
+
+class PeakRSS:
+    """Samples RSS in a background thread for the duration of a with-block.
+
+    Falls back to the process-lifetime peak where /proc is unavailable.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "PeakRSS":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        if not self.peak:
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            self.peak = usage if sys.platform == "darwin" else usage * 1024
+
+    def _sample(self):
+        if not os.path.exists("/proc/self/statm"):
+            return
+        while True:
+            self.peak = max(self.peak, rss_bytes())
+            if self._done.wait(self.interval):
+                return
+
+def percentile(values: List[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def stage_report(timings: List[float], seconds: float, peak_rss: int, units: Optional[Dict[str, int]] = None, errors: int = 0) -> Dict:
+    report = {
+        "count": len(timings),
+        "errors": errors,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3) if timings else None,
+        "p95_ms": round(percentile(timings, 95) * 1000, 3) if timings else None,
+        "p99_ms": round(percentile(timings, 99) * 1000, 3) if timings else None,
+        "ops_per_second": round(len(timings) / seconds, 3) if seconds else None,
+        "peak_rss_mb": round(peak_rss / 2 ** 20, 1)
+    }
+    for unit, total in (units or {}).items():
+        report[f"{unit}_per_second"] = round(total / seconds, 3) if seconds else None
+    return report
+
+def run_stage(items: Iterable, operation: Callable, units: Optional[Callable] = None) -> Dict:
+    """Run operation over items one at a time, timing each call"""
+    timings = []
+    totals = {}
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        for item in items:
+            call_started = time.perf_counter()
+            result = operation(item)
+            timings.append(time.perf_counter() - call_started)
+            for unit, count in (units(item, result) if units else {}).items():
+                totals[unit] = totals.get(unit, 0) + count
+        seconds = time.perf_counter() - started
+    return stage_report(timings, seconds, rss.peak, totals)
+
+def run_http_stage(requests_to_send: List[Callable[[requests.Session], requests.Response]], concurrency: int) -> Dict:
+    """Send requests from concurrency client threads, timing each response"""
+    local = threading.local()
+
+    def send(make_request):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        response = make_request(local.session)
+        return time.perf_counter() - started, response.ok
+
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(send, requests_to_send))
+        seconds = time.perf_counter() - started
+    timings = [elapsed for elapsed, ok in outcomes if ok]
+    return stage_report(timings, seconds, rss.peak, errors=len(outcomes) - len(timings))
+
+def embed(text: str) -> List[float]:
+    """Deterministic pseudo-embedding, so the store is timed without a model"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSION).astype("float32")
+    return (vector / np.linalg.norm(vector)).tolist()
+
+class PseudoEmbedder:
+    """Stands in for the sentence-transformers model with embed()"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return embed(text)
+
+def use_pseudo_embedder():
+    """Make the app embed with PseudoEmbedder instead of loading a model"""
+    from src.rag import ingestion
+    ingestion.get_embedder = PseudoEmbedder
+
+def replay_search_fixtures(path: str = FIXTURES):
+    """Serve paper searches from recorded results, keeping their recorded latency"""
+    from src.tools.paper_search import PaperSearchTool
+    with open(path) as f:
+        fixtures = json.load(f)
+
+    def replay(source):
+        def search(self, query):
+            time.sleep(fixtures[source]["latency"])
+            return fixtures[source]["results"][:self.max_results]
+        return search
+
+    PaperSearchTool._search_arxiv = replay("arxiv")
+    PaperSearchTool._search_scholar = replay("scholar")
+
+def record_fixtures(query: str, path: str = FIXTURES):
+    """Run a live search against arXiv and Scholar and save it as the fixtures"""
+    from src.tools.paper_search import PaperSearchTool
+    tool = PaperSearchTool(max_results=10)
+    fixtures = {}
+    for source, search in (("arxiv", tool._search_arxiv), ("scholar", tool._search_scholar)):
+        started = time.perf_counter()
+        results = search(query)
+        fixtures[source] = {"latency": round(time.perf_counter() - started, 3), "results": results}
+    with open(path, "w") as f:
+        json.dump(fixtures, f, indent=2, default=str)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextlib.contextmanager
+def serve_app():
+    """Serve the FastAPI app with uvicorn on a background thread"""
+    import uvicorn
+    import main as app_module
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/api/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+def library_stages(corpus: Dict[int, List[str]], repeat: int, vector_backend: str, queries: int) -> Dict:
+    from src.rag.backends import create_vector_store
+    from src.rag.document_proccesor import DocumentProcessor
+    from src.tools.pdf_extraction import PDFFile
+    from src.tools.pdf_parser import PDFParserTool
+    parser = PDFParserTool()
+    processor = DocumentProcessor()
+    stages = {}
+    chunks = []
+    for pages, paths in corpus.items():
+        runs = paths * repeat
+        stages[f"pdf_parser[{pages}p]"] = run_stage(runs, lambda path: parser.parse_pdf(PDFFile(path)), lambda path, _: {"pages": pages})
+        stages[f"document_processor[{pages}p]"] = run_stage(
+            runs,
+            processor.process_pdf,
+            lambda path, result: {"pages": pages, "chunks": len(result)}
+        )
+        chunks.extend(chunk for path in paths for chunk in processor.process_pdf(path))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = create_vector_store(directory, backend=vector_backend)
+        batches = [chunks[start:start + 64] for start in range(0, len(chunks), 64)]
+        stages["vector_store_add"] = run_stage(
+            batches,
+            lambda batch: store.add_documents(batch, [embed(chunk['text']) for chunk in batch]),
+            lambda batch, _: {"chunks": len(batch)}
+        )
+        if hasattr(store, "persist"):
+            store.persist()
+        query_embeddings = [embed(f"query {i}") for i in range(queries)]
+        stages["vector_store_query"] = run_stage(query_embeddings, lambda query: store.similarity_search(query, 5))
+    return stages
+
+def api_stages(corpus: Dict[int, List[str]], requests_per_stage: int, concurrency: int) -> Dict:
+    stages = {}
+    # The agent's verbose chain output would otherwise interleave with the report
+    with serve_app() as base_url, contextlib.redirect_stdout(sys.stderr):
+        for pages, paths in corpus.items():
+            stages[f"api_upload_paper[{pages}p]"] = run_http_stage(
+                [upload_request(base_url, path) for path in paths],
+                concurrency
+            )
+        topics = [f"benchmark topic {i}" for i in range(requests_per_stage)]
+        stages["api_research"] = run_http_stage(
+            [
+                lambda session, topic=topic: session.post(f"{base_url}/research", json={"topic": topic})
+                for topic in topics
+            ],
+            concurrency
+        )
+    return stages
+
+def upload_request(base_url: str, path: str) -> Callable[[requests.Session], requests.Response]:
+    def send(session: requests.Session) -> requests.Response:
+        with open(path, "rb") as pdf:
+            return session.post(f"{base_url}/upload-paper", files={"file": (os.path.basename(path), pdf, "application/pdf")})
+    return send
+
+def write_corpus(directory: str, sizes: List[int], documents: int, first_seed: int = 0) -> Dict[int, List[str]]:
+    corpus = {}
+    for pages in sizes:
+        corpus[pages] = []
+        for seed in range(first_seed, first_seed + documents):
+            path = os.path.join(directory, f"paper_{pages}p_{seed}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_pdf(paper_pages(pages, seed=pages * 1000 + seed)))
+            corpus[pages].append(path)
+    return corpus
+
+def regressions(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    found = []
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not previous.get("p95_ms") or current.get("p95_ms") is None:
+            continue
+        growth = current["p95_ms"] / previous["p95_ms"] - 1
+        if growth > max_regression:
+            found.append(f"{stage}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms (+{growth:.0%})")
+    return found
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="2,10,50", help="comma-separated page counts of the synthetic corpus")
+    parser.add_argument("--documents", type=int, default=3, help="synthetic papers per size")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus in library stages")
+    parser.add_argument("--requests", type=int, default=6, help="HTTP requests per API stage")
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent HTTP clients")
+    parser.add_argument("--queries", type=int, default=200, help="vector store queries")
+    parser.add_argument("--vector-backend", default="faiss", help="vector store backend to benchmark")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="stub LLM seconds per token")
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="stub LLM seconds before the first token")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0, help="stub LLM seconds of prefill per prompt token")
+    parser.add_argument("--response-tokens", type=int, default=200, help="stub LLM tokens per response")
+    parser.add_argument("--skip-api", action="store_true", help="only run the library stages")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 growth over the baseline")
+    parser.add_argument("--record-fixtures", metavar="QUERY", help="re-record search fixtures live and exit")
+    args = parser.parse_args(argv)
+
+    if args.record_fixtures:
+        record_fixtures(args.record_fixtures)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as workdir, StubOllama(
+        token_latency=args.token_latency,
+        first_token_latency=args.first_token_latency,
+        prompt_token_latency=args.prompt_token_latency,
+        response_tokens=args.response_tokens
+    ) as stub:
+        # Point the app at the stub and a scratch data directory, and measure
+        # the uncached path on every request
+        os.environ.update({
+            "OLLAMA_HOST": stub.url,
+            "VECTOR_DB_PATH": os.path.join(workdir, "vector_db"),
+            "LLM_CACHE_ENABLED": "false",
+            "SEARCH_CACHE_ENABLED": "false"
+        })
+        from src.config import get_settings
+        get_settings.cache_clear()
+        replay_search_fixtures()
+        use_pseudo_embedder()
+
+        corpus = write_corpus(workdir, sizes, args.documents)
+        stages = library_stages(corpus, args.repeat, args.vector_backend, args.queries)
+        if not args.skip_api:
+            # Fresh papers, so stored analyses never short-circuit an upload
+            uploads = write_corpus(workdir, sizes, args.requests, first_seed=args.documents)
+            stages.update(api_stages(uploads, args.requests, args.concurrency))
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "record_fixtures")},
+            "llm_requests": stub.requests,
+            "stages": stages
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.max_regression)
+        if found:
+            print("p95 regressions over baseline:\n" + "\n".join(found), file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
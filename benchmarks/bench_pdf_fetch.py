@@ -0,0 +1,93 @@
+"""PDF fetcher benchmark and self-check against a local stand-in server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pdf_fetch --papers 10 --latency 0.2
+
+Serves synthetic PDFs from benchmarks/stub_pdf_server.py and times reading
+--papers of them four ways:
+- sequential: plain requests.get calls, one after another
+- pooled: PDFFetcher.afetch_all with an empty cache
+- cached: the same call again while the cache is fresh
+- revalidated: the same call again after the cache has gone stale
+
+It also checks behaviour:
+- failed requests are retried
+- the per-host limit is respected
+- every result parses with PDFParserTool
+
+Prints one JSON report and exits with status 1 if any check fails.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+import requests
+from .stub_pdf_server import StubPDFServer
+
+def timed(server: StubPDFServer, run) -> Dict:
+    before, started = server.requests, time.perf_counter()
+    results = run()
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "requests": server.requests - before,
+        "results": results
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--papers", type=int, default=10, help="PDFs to read per stage")
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in server seconds per request")
+    parser.add_argument("--pages", type=int, default=2, help="pages per synthetic PDF")
+    parser.add_argument("--per-host", type=int, default=4, help="per-host limit for the limit check")
+    args = parser.parse_args(argv)
+
+    from src.cache import FileCache
+    from src.tools.pdf_fetcher import PDFFetcher
+    from src.tools.pdf_parser import PDFParserTool
+
+    stages = {}
+    checks = {}
+    with tempfile.TemporaryDirectory() as workdir, StubPDFServer(latency=args.latency, pages=args.pages) as server:
+        urls = [server.paper_url(i) for i in range(args.papers)]
+        cache = FileCache(os.path.join(workdir, "pdf_cache"))
+
+        def sequential():
+            return [requests.get(url, timeout=30).content for url in urls]
+
+        def fetch_all(fetcher: PDFFetcher):
+            return lambda: asyncio.run(fetcher.afetch_all(urls))
+
+        stages["sequential"] = timed(server, sequential)
+        stages["pooled"] = timed(server, fetch_all(PDFFetcher(cache=cache)))
+        stages["cached"] = timed(server, fetch_all(PDFFetcher(cache=cache)))
+        not_modified = server.not_modified
+        stages["revalidated"] = timed(server, fetch_all(PDFFetcher(cache=cache, fresh_for=0)))
+        expected = [server.paper(i) for i in range(args.papers)]
+        for name, stage in stages.items():
+            checks[f"{name}_correct"] = stage.pop("results") == expected
+        checks["cached_without_requests"] = stages["cached"]["requests"] == 0
+        checks["revalidated_with_304"] = server.not_modified - not_modified == args.papers
+        parser_tool = PDFParserTool()
+        checks["parses"] = all(parser_tool.parse_pdf(body)["title"] for body in expected[:3])
+
+    with StubPDFServer(latency=args.latency, pages=args.pages, fail_first=2) as server:
+        urls = [server.paper_url(i) for i in range(args.papers)]
+        fetcher = PDFFetcher(per_host=args.per_host, backoff=0.01)
+        stage = timed(server, lambda: asyncio.run(fetcher.afetch_all(urls)))
+        checks["retried"] = all(isinstance(body, bytes) for body in stage.pop("results"))
+        checks["per_host_limit"] = server.peak_concurrency <= args.per_host
+        stages["flaky_limited"] = {**stage, "peak_concurrency": server.peak_concurrency}
+
+    report = {"config": vars(args), "stages": stages, "checks": checks}
+    print(json.dumps(report, indent=2))
+    if not all(checks.values()):
+        print("failed checks: " + ", ".join(name for name, ok in checks.items() if not ok), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: recall@k and index size of quantized FAISS stores.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_quantization
+
+Builds a FaissVectorStore per quantization mode over the same synthetic,
+clustered embeddings and compares its top-k against exact search. Prints
+one JSON object per (index type, quantization) pair with recall@k (with
+and without exact re-ranking), the serialized index size and the median
+query latency.
+"""
+import json
+import statistics
+import tempfile
+import time
+import faiss
+import numpy as np
+from src.rag.faiss_store import FaissVectorStore
+
+def clustered_embeddings(count: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dimension)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dimension)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def nearby_queries(vectors: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Queries drawn near stored vectors, as real queries land near relevant chunks"""
+    picked = vectors[rng.integers(0, len(vectors), count)]
+    queries = picked + 0.05 * rng.normal(size=picked.shape).astype("float32")
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def recall(store: FaissVectorStore, queries: np.ndarray, truth: np.ndarray, k: int):
+    hits = 0
+    timings = []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = store.similarity_search(query.tolist(), k)
+        timings.append(time.perf_counter() - started)
+        hits += len({int(r['id'][1:]) for r in results} & set(expected.tolist()))
+    return hits / truth.size, statistics.median(timings)
+
+def main(count: int = 20000, dimension: int = 384, queries: int = 200, k: int = 10):
+    rng = np.random.default_rng(0)
+    vectors = clustered_embeddings(count, dimension, 64, rng)
+    query_vectors = nearby_queries(vectors, queries, rng)
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(vectors)
+    _, truth = exact.search(query_vectors, k)
+    documents = [{'text': '', 'metadata': {'chunk_hash': f"c{i}"}} for i in range(count)]
+    
+    for index_type in ("flat", "ivf", "hnsw"):
+        for quantization in ("none", "fp16", "sq8", "pq"):
+            with tempfile.TemporaryDirectory() as directory:
+                store = FaissVectorStore(
+                    directory,
+                    index_type=index_type,
+                    quantization=quantization,
+                    pq_m=48,
+                    nlist=128,
+                    nprobe=16
+                )
+                # Row ids start at 1, so the document for vector i is "c{i}"
+                store.add_documents(documents, vectors.tolist())
+                index_bytes = faiss.serialize_index(store.index).nbytes
+                reranked, latency = recall(store, query_vectors, truth, k)
+                store.rerank_factor = 1
+                raw, _ = recall(store, query_vectors, truth, k)
+                print(json.dumps({
+                    "index_type": index_type,
+                    "quantization": quantization,
+                    "recall_at_k": raw if quantization == "none" else reranked,
+                    "recall_at_k_without_rerank": raw,
+                    "index_mb": index_bytes / 2 ** 20,
+                    "median_query_ms": latency * 1000
+                }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Micro-benchmark: single-pass section segmenter vs. the legacy regex cascade.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_section_segmenter
+
+Prints one JSON object per document size with the median parse time of
+both implementations, so growth with document size can be compared.
+"""
+import json
+import random
+import re
+import statistics
+import time
+from src.tools.section_segmenter import segment
+
+LEGACY_SECTION_PATTERNS = {
+    'Abstract': r'Abstract.*?(?=Introduction|$)',
+    'Introduction': r'Introduction.*?(?=Methods|Methodology|$)',
+    'Methods': r'Methods.*?(?=Results|$)',
+    'Results': r'Results.*?(?=Discussion|$)',
+    'Discussion': r'Discussion.*?(?=Conclusion|References|$)'
+}
+LEGACY_FIGURES = re.compile(r'Figure \d+:.*?(?=Figure \d+:|$)', re.DOTALL)
+LEGACY_REFERENCES = re.compile(r'References.*', re.DOTALL)
+
+WORDS = "model data network training accuracy baseline experiment dataset layer loss".split()
+
+def legacy_segment(text: str):
+    sections = {}
+    for section, pattern in LEGACY_SECTION_PATTERNS.items():
+        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+        if match:
+            sections[section] = match.group().strip()
+    references = LEGACY_REFERENCES.search(text)
+    return {
+        'sections': sections,
+        'figures': LEGACY_FIGURES.findall(text),
+        'references': references.group() if references else ""
+    }
+
+def synthetic_paper(words: int, with_headings: bool, rng: random.Random) -> str:
+    body = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))
+    if not with_headings:
+        return "A Paper Title\n" + body(words)
+    part = words // 6
+    return "\n".join([
+        "A Paper Title", "Abstract", body(part), "Introduction", body(part),
+        "Methods", body(part), "Figure 1: " + body(20), "Results", body(part),
+        "Figure 2: " + body(20), "Discussion", body(part), "Conclusion", body(part),
+        "References", body(50)
+    ])
+
+def median_time(parse, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(text)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main(repeat: int = 5):
+    rng = random.Random(0)
+    for with_headings in (True, False):
+        for words in (10_000, 40_000, 160_000):
+            text = synthetic_paper(words, with_headings, rng)
+            new = segment(text)
+            assert {k: new[k] for k in ('sections', 'figures', 'references')} == legacy_segment(text)
+            print(json.dumps({
+                "headings": with_headings,
+                "chars": len(text),
+                "legacy_seconds": median_time(legacy_segment, text, repeat),
+                "segmenter_seconds": median_time(segment, text, repeat)
+            }))
+
+if __name__ == "__main__":
+    main()
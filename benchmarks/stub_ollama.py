@@ -0,0 +1,168 @@
+"""A stand-in for Ollama's /api/generate with configurable token latency.
+
+Responses are canned but shaped like the real model's: ReAct prompts get a
+paper_search action followed by a final answer, everything else gets a
+numbered, sectioned answer that the planner and summarizer parse.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+TOKEN = re.compile(r'\S+\s*')
+
+FILLER = "the results suggest that the proposed approach improves accuracy on the benchmark".split()
+
+def canned_response(prompt: str, tokens: int = 200) -> str:
+    """A plausible completion for the prompts this app sends"""
+    words = [FILLER[i % len(FILLER)] for i in range(tokens)]
+    filler = " ".join(words)
+    if "Tool names:" in prompt:
+        if "Action: paper_search" in prompt:
+            return f"Thought: I have enough papers.\nFinal Answer: {filler}"
+        task = re.search(r'Current task: (.*)', prompt)
+        return (
+            "Thought: I should search for relevant papers.\n"
+            "Action: paper_search\n"
+            f"Action Input: {task.group(1).strip() if task else 'research'}"
+        )
+    
+    headings = [
+        "Main Research Questions", "Required Information", "Specific Tasks", "Expected Outputs",
+        "Main findings", "Methodology", "Key contributions", "Limitations", "Future work"
+    ]
+    per_section = max(len(words) // len(headings), 1)
+    return "\n".join(
+        f"{i}. {heading}\n- {' '.join(words[:per_section])}"
+        for i, heading in enumerate(headings, 1)
+    )
+
+class StubOllama:
+    """Threaded HTTP server answering /api/generate after a simulated delay.
+
+    Each request waits first_token_latency plus prompt_token_latency per
+    prompt token (prefill), then token_latency per generated token, in both streaming and non-streaming mode. The first
+    request also pays load_latency, as Ollama does while loading the model;
+    like Ollama, a request without a prompt only loads the model.
+    """
+
+    def __init__(
+        self,
+        token_latency: float = 0.005,
+        first_token_latency: float = 0.05,
+        response_tokens: int = 200,
+        respond: Optional[Callable[[str, int], str]] = None,
+        load_latency: float = 0.0,
+        prompt_token_latency: float = 0.0
+    ):
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.response_tokens = response_tokens
+        self.respond = respond or canned_response
+        self.load_latency = load_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.requests = 0
+        self.loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllama":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubOllama":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def tokens(self, prompt: str, stop: Optional[List[str]]) -> List[str]:
+        text = self.respond(prompt, self.response_tokens)
+        for marker in stop or []:
+            index = text.find(marker)
+            if index != -1:
+                text = text[:index]
+        return TOKEN.findall(text)
+
+    def load(self):
+        with self._load_lock:
+            if not self.loaded.is_set():
+                time.sleep(self.load_latency)
+                self.loaded.set()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests += 1
+                stub.load()
+                if "prompt" not in body:
+                    self._send_json({"model": body.get("model", ""), "response": "", "done": True})
+                    return
+                tokens = stub.tokens(body.get("prompt", ""), body.get("options", {}).get("stop"))
+                counts = {
+                    "prompt_eval_count": len(TOKEN.findall(body.get("prompt", ""))),
+                    "eval_count": len(tokens)
+                }
+                time.sleep(stub.first_token_latency + stub.prompt_token_latency * counts["prompt_eval_count"])
+                if body.get("stream", True):
+                    self._stream(body.get("model", ""), tokens, counts)
+                else:
+                    time.sleep(stub.token_latency * len(tokens))
+                    self._send_json({"model": body.get("model", ""), "response": "".join(tokens), "done": True, **counts})
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": []})
+                else:
+                    self.send_error(404)
+
+            def _stream(self, model: str, tokens: List[str], counts: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for token in tokens:
+                    time.sleep(stub.token_latency)
+                    self.wfile.write(json.dumps({"model": model, "response": token, "done": False}).encode() + b"\n")
+                    self.wfile.flush()
+                self.wfile.write(json.dumps({"model": model, "response": "", "done": True, **counts}).encode() + b"\n")
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+if __name__ == "__main__":
+    with StubOllama() as stub:
+        print(f"Stub Ollama listening on {stub.url}")
+        threading.Event().wait()
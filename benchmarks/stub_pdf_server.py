@@ -0,0 +1,121 @@
+"""A stand-in PDF host for exercising the PDF fetcher offline.
+
+Serves synthetic papers at /papers/<n>.pdf with a fixed per-request latency,
+an ETag and Last-Modified header, and 304 responses to matching conditional
+requests. Paths can be made to fail their first requests with 503 to
+exercise retries.
+"""
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from .synthetic_pdf import synthetic_paper
+
+class StubPDFServer:
+    """Threaded HTTP server for /papers/<n>.pdf.
+
+    Each request waits ``latency`` seconds. The first ``fail_first``
+    requests for every path get a 503 with Retry-After: 0. ``requests``,
+    ``not_modified`` and ``peak_concurrency`` count what clients did.
+    """
+
+    def __init__(self, latency: float = 0.2, pages: int = 2, fail_first: int = 0):
+        self.latency = latency
+        self.pages = pages
+        self.fail_first = fail_first
+        self.requests = 0
+        self.not_modified = 0
+        self.peak_concurrency = 0
+        self.modified = formatdate(usegmt=True)
+        self._active = 0
+        self._attempts: Dict[str, int] = {}
+        self._papers: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def paper_url(self, number: int) -> str:
+        return f"{self.url}/papers/{number}.pdf"
+
+    def start(self) -> "StubPDFServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubPDFServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def paper(self, number: int) -> bytes:
+        key = str(number)
+        with self._lock:
+            if key not in self._papers:
+                self._papers[key] = synthetic_paper(self.pages, seed=number)
+            return self._papers[key]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub._active += 1
+                    stub.peak_concurrency = max(stub.peak_concurrency, stub._active)
+                    attempt = stub._attempts[self.path] = stub._attempts.get(self.path, 0) + 1
+                try:
+                    time.sleep(stub.latency)
+                    self._respond(attempt)
+                finally:
+                    with stub._lock:
+                        stub._active -= 1
+
+            def _respond(self, attempt: int):
+                name = self.path.rsplit("/", 1)[-1]
+                if not self.path.startswith("/papers/") or not name[:-len(".pdf")].isdigit():
+                    self._send(404, b"")
+                    return
+                if attempt <= stub.fail_first:
+                    self._send(503, b"", {"Retry-After": "0"})
+                    return
+                body = stub.paper(int(name[:-len(".pdf")]))
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self._send(304, b"", {"ETag": etag})
+                    return
+                self._send(200, body, {
+                    "Content-Type": "application/pdf",
+                    "ETag": etag,
+                    "Last-Modified": stub.modified
+                })
+
+            def _send(self, status: int, body: bytes, headers: Dict[str, str] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,77 @@
+"""Synthetic research papers as small, uncompressed PDFs.
+
+Pages carry the headings, figure captions and references the parser looks
+for, so the whole pipeline has realistic structure to work on without any
+files checked into the repo.
+"""
+import random
+from typing import List
+
+WORDS = (
+    "model data network training accuracy baseline experiment dataset layer loss "
+    "attention transformer gradient optimization benchmark evaluation sample feature"
+).split()
+
+SECTIONS = ["Abstract", "Introduction", "Methods", "Results", "Discussion", "Conclusion"]
+
+LINES_PER_PAGE = 55
+WORDS_PER_LINE = 12
+
+def paper_pages(pages: int, seed: int = 0) -> List[str]:
+    """Page texts of a paper with the given number of pages"""
+    rng = random.Random(seed)
+    lines = [f"Synthetic Study {seed} of {' '.join(rng.choice(WORDS) for _ in range(4))}"]
+    body_lines = pages * LINES_PER_PAGE - 1
+    section_every = max(body_lines // (len(SECTIONS) + 1), 1)
+    section = 0
+    for i in range(body_lines):
+        if i % section_every == 0 and section < len(SECTIONS):
+            lines.append(SECTIONS[section])
+            section += 1
+        elif i % 40 == 20:
+            lines.append(f"Figure {i // 40 + 1}: {' '.join(rng.choice(WORDS) for _ in range(8))}")
+        else:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(WORDS_PER_LINE)))
+    lines.append("References")
+    lines.extend(f"[{i}] {' '.join(rng.choice(WORDS) for _ in range(6))}" for i in range(1, 21))
+    return [
+        "\n".join(lines[start:start + LINES_PER_PAGE])
+        for start in range(0, len(lines), LINES_PER_PAGE)
+    ]
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Minimal PDF with one Helvetica text block per page"""
+    count = len(pages)
+    font_id = 3 + 2 * count
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(count))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {count} >>"
+    ]
+    for i, text in enumerate(pages):
+        shown = " ".join(f"({_escape(line)}) Tj T*" for line in text.split("\n"))
+        content = f"BT /F1 10 Tf 12 TL 50 750 Td {shown} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def synthetic_paper(pages: int, seed: int = 0) -> bytes:
+    return make_pdf(paper_pages(pages, seed))
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
@@ -1,16 +1,66 @@
-from fastapi import FastAPI
-from src.api.routes import router
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from src import telemetry
+from src.api.routes import get_warmup, router
 from src.config import get_settings
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the agents and load the model in the background; the port is
+    # already bound and /api/v1/ready reports progress
+    if settings.WARMUP_ON_STARTUP:
+        get_warmup().start()
+    yield
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
 app.include_router(router, prefix="/api/v1")
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose declared size is over the limit before reading the body"""
+    content_length = request.headers.get("content-length")
+    # Batch comparisons carry many papers in one request
+    if request.url.path.endswith("/compare-papers"):
+        limit = settings.COMPARE_MAX_BYTES
+    else:
+        limit = settings.MAX_UPLOAD_BYTES
+    # Allow some headroom for multipart boundaries and form fields
+    if content_length and content_length.isdigit() and int(content_length) > limit + 64 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload exceeds the {limit} byte limit"}
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Time every request by route; record a full trace when TRACE_REQUESTS is set or the client sends X-Trace: 1.
+
+    Traced responses carry an X-Trace-Id header; the spans are served from
+    /api/v1/traces/{trace_id}. Streaming responses keep adding spans after
+    the headers are sent.
+    """
+    trace = None
+    if settings.TRACE_REQUESTS or request.headers.get("x-trace", "").lower() in ("1", "true"):
+        trace = telemetry.start_trace()
+    with telemetry.span("http") as current:
+        response = await call_next(request)
+        # Name the span after the matched route template to keep labels low-cardinality
+        route = request.scope.get("route")
+        current.name = f"http {request.method} {route.path if route else 'unmatched'}"
+        current.set(status=response.status_code)
+    if trace is not None:
+        response.headers["X-Trace-Id"] = trace.id
+    return response
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8080)
\ No newline at end of file
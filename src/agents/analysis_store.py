@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import Dict, Optional
+import os
+from ..cache import DiskCache, LRUCache, TieredCache
+from ..config import get_settings
+
+class AnalysisStore:
+    """Parsed papers, their analyses and summaries, keyed by PDF content hash.
+
+    Parsed structure depends only on the PDF bytes. Analyses are also keyed
+    by model and prompt version, so changing either invalidates them while
+    the parse is still reused.
+    """
+
+    def __init__(self, cache: TieredCache, model: str):
+        self.cache = cache
+        self.model = model
+
+    def get_parsed(self, content_hash: str) -> Optional[Dict]:
+        return self.cache.get(f"parsed:{content_hash}")
+
+    def put_parsed(self, content_hash: str, parsed: Dict):
+        self.cache.set(f"parsed:{content_hash}", parsed)
+
+    def get_analysis(self, content_hash: str, prompt_version: str) -> Optional[Dict]:
+        return self.cache.get(self._analysis_key(content_hash, prompt_version))
+
+    def put_analysis(self, content_hash: str, prompt_version: str, analysis: Dict):
+        self.cache.set(self._analysis_key(content_hash, prompt_version), analysis)
+
+    def get_summary(self, content_hash: str, prompt_version: str) -> Optional[Dict]:
+        return self.cache.get(self._summary_key(content_hash, prompt_version))
+
+    def put_summary(self, content_hash: str, prompt_version: str, summary: Dict):
+        self.cache.set(self._summary_key(content_hash, prompt_version), summary)
+
+    def _analysis_key(self, content_hash: str, prompt_version: str) -> str:
+        return f"analysis:{content_hash}:{self.model}:{prompt_version}"
+
+    def _summary_key(self, content_hash: str, prompt_version: str) -> str:
+        return f"summary:{content_hash}:{self.model}:{prompt_version}"
+
+@lru_cache()
+def get_analysis_store() -> AnalysisStore:
+    """Process-wide analysis store (memory LRU + SQLite under VECTOR_DB_PATH)"""
+    settings = get_settings()
+    return AnalysisStore(
+        TieredCache(
+            LRUCache(settings.ANALYSIS_STORE_MEMORY_ENTRIES),
+            DiskCache(
+                os.path.join(settings.VECTOR_DB_PATH, "analysis_store.sqlite"),
+                max_bytes=settings.ANALYSIS_STORE_MAX_BYTES
+            )
+        ),
+        model=settings.OLLAMA_MODEL
+    )
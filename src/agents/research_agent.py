@@ -1,12 +1,22 @@
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
-from langchain_community.llms import Ollama
 from langchain.tools import BaseTool
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import asyncio
+import json
 import os
+import re
+import time
+from .. import telemetry
+from ..config import get_settings
+from ..llm.gateway import PRIORITY_LOW, PRIORITY_NORMAL, LLMQueueFullError
+from ..llm.langchain_llm import GatewayLLM
 from ..tools.paper_search import PaperSearchTool
+from ..tools.pdf_extraction import PDFSource, fingerprint
+from ..tools.pdf_fetcher import get_pdf_fetcher
+from .analysis_store import get_analysis_store
 from ..tools.pdf_parser import PDFParserTool
-from ..tools.summarizer import SummarizerTool
+from ..tools.summarizer import SummarizerTool, estimate_tokens
 
 class CustomPromptTemplate(PromptTemplate):
     def format_prompt(self, **kwargs) -> str:
@@ -17,25 +27,46 @@ class CustomPromptTemplate(PromptTemplate):
     def format(self, **kwargs) -> str:
         return self.format_prompt(**kwargs)
 
+# Bump whenever _analysis_prompt or _question_prompt changes so stored analyses are invalidated
+ANALYSIS_PROMPT_VERSION = "2"
+
+# (heading, retrieval query) for each part of an analysis
+ANALYSIS_QUESTIONS = [
+    ("Main research question", "What research question or problem does the paper address?"),
+    ("Methodology used", "What methodology, data and experimental setup does the paper use?"),
+    ("Key findings", "What are the key findings and results?"),
+    ("Limitations", "What limitations or weaknesses does the paper acknowledge?"),
+    ("Future research directions", "What future work or open problems does the paper suggest?")
+]
+
+PAPER_SECTIONS = ("abstract", "introduction", "methods", "results", "discussion")
+
+# Bump whenever the SummarizerTool summary prompts change
+SUMMARY_PROMPT_VERSION = "1"
+
+# A numbered heading line such as "1. Main research question" or "**2) Methodology**"
+SECTION_HEADING = re.compile(r'^\s*\**\s*\d+[.)]\s*\S')
+
 class ResearchAgent:
-    def __init__(self):
-        # Get Ollama configuration from environment variables
-        ollama_host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
-        ollama_model = os.getenv('OLLAMA_MODEL', 'gemma')
-        
-        # Using Ollama with configuration from environment variables
-        self.llm = Ollama(
-            base_url=ollama_host,
-            model=ollama_model
-        )
+    def __init__(self, embedder=None):
+        # Agent steps and paper analyses share the process-wide LLM gateway;
+        # long analyses queue behind shorter calls. ReAct steps depend on live
+        # tool output, so they bypass the completion cache.
+        self.llm = GatewayLLM(priority=PRIORITY_NORMAL, use_cache=False)
+        self.analysis_llm = GatewayLLM(priority=PRIORITY_LOW)
+        # Used for retrieval over long papers; defaults to the shared embedder
+        self.embedder = embedder
+        self.summarizer = SummarizerTool()
         self.tools = self._setup_tools()
         self.agent_executor = self._setup_agent()
     
     def _setup_tools(self) -> List[BaseTool]:
+        search = PaperSearchTool()
         return [
-            PaperSearchTool(),
-            PDFParserTool(),
-            SummarizerTool()
+            search,
+            # The parser may also fetch from hosts the search has returned
+            PDFParserTool(search_results=search.get_sources),
+            self.summarizer
         ]
     
     def _setup_agent(self) -> AgentExecutor:
@@ -88,21 +119,353 @@ class ResearchAgent:
     
     async def research(self, topic: str) -> Dict:
         """Execute research on a given topic"""
-        result = await self.agent_executor.arun(topic)
+        with telemetry.span("agent.research"):
+            result = await self.agent_executor.ainvoke({"input": topic})
         return {
             "topic": topic,
-            "findings": result,
+            "findings": result["output"],
             "sources": self.agent_executor.tools[0].get_sources()
         }
     
-    async def analyze_paper(self, content: bytes) -> Dict:
-        """Analyze a research paper"""
-        # Parse the PDF
-        pdf_parser = PDFParserTool()
-        parsed_content = pdf_parser.parse_pdf(content)
+    async def research_stream(self, topic: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Execute research, yielding (event, data) pairs for each agent step"""
+        started = time.perf_counter()
+        final_output = None
+        async for chunk in self.agent_executor.astream({"input": topic}):
+            for action in chunk.get("actions", []):
+                yield "step", {
+                    "tool": action.tool,
+                    "tool_input": action.tool_input,
+                    "log": action.log
+                }
+            for step in chunk.get("steps", []):
+                if step.action.tool == self.tools[0].name:
+                    for result in self._search_results(step.observation):
+                        yield "search_result", result
+                else:
+                    yield "observation", {
+                        "tool": step.action.tool,
+                        "observation": str(step.observation)
+                    }
+            if "output" in chunk:
+                final_output = chunk["output"]
+        
+        telemetry.record("agent.research_stream", time.perf_counter() - started)
+        yield "results", {
+            "topic": topic,
+            "findings": final_output,
+            "sources": self.agent_executor.tools[0].get_sources()
+        }
+    
+    async def research_pipeline(self, topic: str, max_papers: int = 10) -> Dict:
+        """Research a topic with the fixed search, read, summarize, compare pipeline"""
+        async for event, data in self.research_pipeline_stream(topic, max_papers):
+            if event == "results":
+                return data
+        raise RuntimeError("Research pipeline ended without results")
+    
+    async def research_pipeline_stream(self, topic: str, max_papers: int = 10) -> AsyncIterator[Tuple[str, Any]]:
+        """Research a topic without the ReAct loop, yielding (event, data) pairs.
+
+        Searches once, downloads and summarizes the top RESEARCH_PIPELINE_PAPERS
+        results that have a PDF concurrently, then synthesizes them in a single
+        compare_papers call. No LLM calls are spent choosing tools. When no PDF
+        can be read, the synthesis works from the search abstracts instead.
+        """
+        started = time.perf_counter()
+        with telemetry.span("agent.pipeline_search"):
+            sources, search_errors = await PaperSearchTool(max_results=max_papers).asearch(topic)
+        for result in sources:
+            yield "search_result", result
+        
+        readable = [source for source in sources if source.get("pdf_url")]
+        readable = readable[:get_settings().RESEARCH_PIPELINE_PAPERS]
+        papers: List[Optional[Dict]] = [None] * len(readable)
+        
+        async def read(i: int, source: Dict) -> Tuple[int, Dict]:
+            return i, await self._read_paper(source)
+        
+        # Tasks, so the other reads can be cancelled if one raises or the stream is closed
+        reads = [asyncio.ensure_future(read(i, source)) for i, source in enumerate(readable)]
+        try:
+            for completed in asyncio.as_completed(reads):
+                i, paper = await completed
+                papers[i] = paper
+                yield "paper", paper
+        finally:
+            for task in reads:
+                task.cancel()
+            await asyncio.gather(*reads, return_exceptions=True)
+        
+        summarized = [paper for paper in papers if "summary" in paper]
+        if summarized:
+            findings = await self.compare_papers(summarized)
+        elif sources:
+            findings = await self.summarizer.compare_papers(
+                [{"abstract": [source.get("summary") or source.get("abstract") or ""]} for source in sources],
+                titles=[source.get("title", "") for source in sources]
+            )
+        else:
+            findings = None
+        
+        telemetry.record("agent.research_pipeline", time.perf_counter() - started, papers=len(summarized))
+        results = {
+            "topic": topic,
+            "findings": findings,
+            "sources": sources,
+            "papers": papers
+        }
+        if search_errors:
+            results["search_errors"] = search_errors
+        yield "results", results
+    
+    async def _read_paper(self, source: Dict) -> Dict:
+        """Download and summarize one search result, reporting failure in the result"""
+        paper = {"title": source.get("title", ""), "pdf_url": source["pdf_url"]}
+        try:
+            # Spooled to disk so concurrent papers are not all held in memory
+            content = await get_pdf_fetcher().afetch_file(source["pdf_url"], get_settings().UPLOAD_TMP_DIR)
+            try:
+                paper["summary"] = (await self.summarize_paper(content))['summary']
+            finally:
+                os.remove(content.path)
+        except LLMQueueFullError:
+            raise
+        except Exception as e:
+            paper["error"] = str(e)
+        return paper
+    
+    def _search_results(self, observation: Any) -> List[Dict]:
+        """Decode the JSON payload returned by the paper search tool"""
+        try:
+            return json.loads(observation).get("results", [])
+        except (TypeError, ValueError, AttributeError):
+            return []
+    
+    async def search_questions(self, questions: List[str], max_results: int = 10) -> Dict[str, List[Dict]]:
+        """Run one paper search per research question, all concurrently"""
+        searches = [PaperSearchTool(max_results=max_results).asearch(question) for question in questions]
+        with telemetry.span("agent.search_questions", questions=len(questions)):
+            results = await asyncio.gather(*searches)
+        return {question: papers for question, (papers, _) in zip(questions, results)}
+    
+    async def analyze_paper(self, content: PDFSource, content_hash: Optional[str] = None) -> Dict:
+        """Analyze a research paper given as bytes or a PDFFile.
+
+        Results are stored by content hash, so re-uploads of the same PDF
+        return without parsing or calling the LLM.
+        """
+        store = get_analysis_store()
+        with telemetry.span("agent.analyze_paper") as current:
+            if content_hash is None:
+                content_hash = await self._fingerprint(content)
+            cached = store.get_analysis(content_hash, ANALYSIS_PROMPT_VERSION)
+            current.set(cached=cached is not None)
+            if cached is not None:
+                return cached
+            
+            # Parse the PDF
+            parsed_content = await self._parse(content, content_hash)
+            
+            # Generate analysis using the LLM
+            result = {
+                "title": parsed_content['title'],
+                "analysis": await self._analyze(parsed_content),
+                "figures": parsed_content['figures'],
+                "references": parsed_content['references']
+            }
+        store.put_analysis(content_hash, ANALYSIS_PROMPT_VERSION, result)
+        return result
+    
+    async def summarize_paper(self, content: PDFSource, content_hash: Optional[str] = None) -> Dict:
+        """Summarize a paper given as bytes or a PDFFile, reusing stored summaries"""
+        store = get_analysis_store()
+        with telemetry.span("agent.summarize_paper") as current:
+            if content_hash is None:
+                content_hash = await self._fingerprint(content)
+            cached = store.get_summary(content_hash, SUMMARY_PROMPT_VERSION)
+            current.set(cached=cached is not None)
+            if cached is not None:
+                return cached
+            
+            parsed_content = await self._parse(content, content_hash)
+            result = {
+                "title": parsed_content['title'],
+                "summary": await self.summarizer.summarize_paper(parsed_content)
+            }
+        store.put_summary(content_hash, SUMMARY_PROMPT_VERSION, result)
+        return result
+    
+    async def compare_papers(self, papers: List[Dict]) -> str:
+        """Compare papers summarized by summarize_paper"""
+        return await self.summarizer.compare_papers(
+            [paper['summary'] for paper in papers],
+            titles=[paper['title'] for paper in papers]
+        )
+    
+    async def _fingerprint(self, content: PDFSource) -> str:
+        with telemetry.span("agent.fingerprint"):
+            return await asyncio.get_running_loop().run_in_executor(None, fingerprint, content)
+    
+    async def _parse(self, content: PDFSource, content_hash: str) -> Dict:
+        """Parse a PDF, reusing the stored structure for previously seen content"""
+        store = get_analysis_store()
+        with telemetry.span("agent.parse") as current:
+            parsed_content = store.get_parsed(content_hash)
+            current.set(cached=parsed_content is not None)
+            if parsed_content is None:
+                parsed_content = await PDFParserTool().aparse_pdf(content)
+                store.put_parsed(content_hash, parsed_content)
+            return parsed_content
+    
+    async def analyze_paper_stream(self, content: PDFSource, content_hash: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Analyze a research paper, yielding (event, data) pairs as tokens arrive"""
+        store = get_analysis_store()
+        if content_hash is None:
+            content_hash = await self._fingerprint(content)
+        cached = store.get_analysis(content_hash, ANALYSIS_PROMPT_VERSION)
+        if cached is not None:
+            yield "parsed", {
+                "title": cached['title'],
+                "figures": len(cached['figures'])
+            }
+            yield "analysis", cached
+            return
+        
+        parsed_content = await self._parse(content, content_hash)
+        yield "parsed", {
+            "title": parsed_content['title'],
+            "figures": len(parsed_content['figures'])
+        }
+        
+        if self._needs_retrieval(parsed_content):
+            # Answers are generated concurrently; report each as it completes
+            prompts = await self._question_prompts(parsed_content)
+            answers = [None] * len(prompts)
+            
+            async def answer(i: int, prompt: str) -> Tuple[int, str]:
+                return i, await self._complete(prompt)
+            
+            for completed in asyncio.as_completed([answer(i, prompt) for i, prompt in enumerate(prompts)]):
+                i, text = await completed
+                answers[i] = self._format_answer(i, text)
+                yield "section", answers[i]
+            text = "\n\n".join(answers)
+        else:
+            text = ""
+            section_start = 0
+            line_start = 0
+            async for token in self.analysis_llm.astream(self._analysis_prompt(parsed_content)):
+                yield "token", token
+                text += token
+                # Each completed heading line closes the section before it
+                line_end = text.find("\n", line_start)
+                while line_end != -1:
+                    if SECTION_HEADING.match(text[line_start:line_end]) and text[section_start:line_start].strip():
+                        yield "section", text[section_start:line_start].strip()
+                        section_start = line_start
+                    line_start = line_end + 1
+                    line_end = text.find("\n", line_start)
+            if text[section_start:].strip():
+                yield "section", text[section_start:].strip()
+        
+        result = {
+            "title": parsed_content['title'],
+            "analysis": text,
+            "figures": parsed_content['figures'],
+            "references": parsed_content['references']
+        }
+        store.put_analysis(content_hash, ANALYSIS_PROMPT_VERSION, result)
+        yield "analysis", result
+    
+    async def _analyze(self, parsed_content: Dict) -> str:
+        """Analyze a parsed paper in one prompt, or question by question over retrieved chunks"""
+        if not self._needs_retrieval(parsed_content):
+            return await self._complete(self._analysis_prompt(parsed_content))
+        prompts = await self._question_prompts(parsed_content)
+        answers = await asyncio.gather(*(self._complete(prompt) for prompt in prompts))
+        return "\n\n".join(self._format_answer(i, answer) for i, answer in enumerate(answers))
+    
+    async def _complete(self, prompt: str) -> str:
+        response = await self.analysis_llm.agenerate([prompt])
+        return response.generations[0][0].text
+    
+    def _needs_retrieval(self, parsed_content: Dict) -> bool:
+        """Whether the full-paper prompt would exceed ANALYSIS_CONTEXT_TOKENS"""
+        budget = get_settings().ANALYSIS_CONTEXT_TOKENS
+        return budget is not None and estimate_tokens(self._format_analysis_prompt(parsed_content)) > budget
+    
+    async def _question_prompts(self, parsed_content: Dict) -> List[str]:
+        """One prompt per analysis question, each carrying only the chunks retrieved for it"""
+        loop = asyncio.get_running_loop()
+        with telemetry.span("agent.retrieve") as current:
+            contexts = await loop.run_in_executor(
+                None, telemetry.in_context(lambda: self._retrieve_context(parsed_content))
+            )
+            current.set(questions=len(contexts))
+        return [
+            self._question_prompt(parsed_content['title'], question, context)
+            for (_, question), context in zip(ANALYSIS_QUESTIONS, contexts)
+        ]
+    
+    def _retrieve_context(self, parsed_content: Dict) -> List[str]:
+        """Chunk and embed the paper into an in-memory index, then take the top chunks per question"""
+        from ..rag.document_proccesor import DocumentProcessor
+        from ..rag.faiss_store import FaissVectorStore
+        from ..rag.ingestion import get_embedder
         
-        # Generate analysis using the LLM
-        analysis_prompt = f"""
+        processor = DocumentProcessor()
+        chunks = []
+        for section in PAPER_SECTIONS:
+            for chunk in processor.process_text(parsed_content.get(section) or "", section):
+                chunk['metadata']['section'] = section
+                chunks.append(chunk)
+        if not chunks:
+            return [""] * len(ANALYSIS_QUESTIONS)
+        
+        embedder = self.embedder or get_embedder()
+        embeddings = embedder.embed_documents(
+            [chunk['text'] for chunk in chunks] + [question for _, question in ANALYSIS_QUESTIONS]
+        )
+        store = FaissVectorStore(None)
+        store.add_documents(chunks, embeddings[:len(chunks)])
+        # Retrieved chunks go into the prompt in reading order
+        position = {}
+        for i, chunk in enumerate(chunks):
+            position.setdefault(chunk['metadata']['chunk_hash'], i)
+        top_k = get_settings().ANALYSIS_TOP_K
+        
+        contexts = []
+        for embedding in embeddings[len(chunks):]:
+            hits = sorted(store.similarity_search(embedding, top_k=top_k), key=lambda hit: position[hit['id']])
+            contexts.append("\n\n".join(
+                f"[{hit['metadata']['section'].title()}] {hit['text']}" for hit in hits
+            ))
+        telemetry.annotate(chunks=len(chunks), top_k=top_k)
+        return contexts
+    
+    def _question_prompt(self, title: str, question: str, context: str) -> str:
+        return f"""
+        Answer the question about this research paper using only the excerpts below.
+        Answer in a short paragraph; say so if the excerpts do not cover it.
+
+        Question: {question}
+
+        Title: {title}
+        Excerpts:
+        {context}
+        """
+    
+    def _format_answer(self, index: int, answer: str) -> str:
+        return f"{index + 1}. {ANALYSIS_QUESTIONS[index][0]}\n{answer.strip()}"
+    
+    def _analysis_prompt(self, parsed_content: Dict) -> str:
+        """Build the analysis prompt for a parsed paper"""
+        with telemetry.span("agent.prompt"):
+            return self._format_analysis_prompt(parsed_content)
+    
+    def _format_analysis_prompt(self, parsed_content: Dict) -> str:
+        return f"""
         Analyze this research paper and provide:
         1. Main research question
         2. Methodology used
@@ -117,12 +480,4 @@ class ResearchAgent:
         Methods: {parsed_content['methods']}
         Results: {parsed_content['results']}
         Discussion: {parsed_content['discussion']}
-        """
-        
-        analysis = await self.llm.agenerate([analysis_prompt])
-        return {
-            "title": parsed_content['title'],
-            "analysis": analysis.generations[0][0].text,
-            "figures": parsed_content['figures'],
-            "references": parsed_content['references']
-        }
\ No newline at end of file
+        """
\ No newline at end of file
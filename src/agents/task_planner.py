@@ -1,15 +1,14 @@
-from langchain_community.llms import Ollama
 from langchain.prompts import ChatPromptTemplate
 from typing import List, Dict
-import os
+from .. import telemetry
+from ..llm.gateway import PRIORITY_HIGH
+from ..llm.langchain_llm import GatewayLLM
 
 class TaskPlanner:
     def __init__(self):
-        ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        ollama_model = os.getenv("OLLAMA_MODEL", "gemma")
-        self.llm = Ollama(
-            base_url=ollama_host,
-            model=ollama_model,
+        # Planner calls are short, so they jump ahead of queued analyses
+        self.llm = GatewayLLM(
+            priority=PRIORITY_HIGH,
             temperature=0.3
         )
         self.prompt = ChatPromptTemplate.from_template(
@@ -29,8 +28,11 @@ class TaskPlanner:
     
     async def create_plan(self, topic: str) -> Dict:
         """Create a research plan for the given topic"""
-        response = await self.llm.agenerate([self.prompt.format_messages(topic=topic)])
-        return self._parse_plan(response.generations[0][0].text)
+        with telemetry.span("planner.create_plan"):
+            with telemetry.span("planner.prompt"):
+                prompt = self.prompt.format(topic=topic)
+            response = await self.llm.agenerate([prompt])
+            return self._parse_plan(response.generations[0][0].text)
     
     def _parse_plan(self, plan_text: str) -> Dict:
         """Parse the plan text into structured format"""
@@ -0,0 +1,196 @@
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+import uuid
+from .. import telemetry
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+class Job:
+    def __init__(self, key: str, payload: Dict):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[Dict] = None
+        self.submissions = 1
+        # The first submitter's context, so the job is traced with its request
+        self.context = contextvars.copy_context()
+        self.started = asyncio.Event()
+        self.finished = asyncio.Event()
+
+    def as_dict(self) -> Dict:
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "submissions": self.submissions
+        }
+        if self.status == "succeeded":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+    async def events(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield (event, data) pairs as the job moves through its states"""
+        if not self.started.is_set():
+            yield "status", {"job_id": self.id, "status": self.status}
+            await self.started.wait()
+        if not self.finished.is_set():
+            yield "status", {"job_id": self.id, "status": self.status}
+            await self.finished.wait()
+        if self.status == "succeeded":
+            yield "result", self.result
+        else:
+            yield "error", self.error
+
+class JobQueue:
+    """Runs submitted jobs on a fixed number of worker tasks.
+
+    Submissions with the same payload as a queued or running job join that
+    job instead of starting another, so one execution answers every
+    submitter. Finished jobs stay available for ``retention`` seconds.
+    run_now starts a job straight away instead, outside the workers and
+    the ``max_pending`` limit, for callers that wait on the result anyway.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Dict], Awaitable[Any]],
+        workers: int = 2,
+        max_pending: int = 100,
+        retention: float = 3600.0,
+        describe_error: Optional[Callable[[Exception], Dict]] = None
+    ):
+        self.run = run
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.describe_error = describe_error or (lambda e: {"detail": str(e)})
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+        self._finished: Deque[Job] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        # Jobs started by run_now, referenced until they finish
+        self._running = set()
+
+    def submit(self, payload: Dict, key: Optional[str] = None) -> Tuple[Job, bool]:
+        """Queue a job for payload, returning (job, joined_existing).
+
+        Jobs are deduplicated by ``key``, which defaults to a hash of the
+        payload.
+        """
+        self._ensure_workers()
+        self._expire()
+        key = key or self.job_key(payload)
+        job = self._in_flight.get(key)
+        if job is not None:
+            job.submissions += 1
+            return job, True
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFullError(f"Job queue is full ({self.max_pending} jobs waiting)")
+
+        job = Job(key, payload)
+        self._jobs[job.id] = job
+        self._in_flight[key] = job
+        self._queue.put_nowait(job)
+        return job, False
+
+    async def run_now(self, payload: Dict, key: Optional[str] = None) -> Job:
+        """Run a job for payload without queueing it and return it once finished.
+
+        Joins a queued or running job with the same key instead, like submit.
+        The job keeps running for other submitters if the caller is cancelled.
+        """
+        self._ensure_workers()
+        self._expire()
+        key = key or self.job_key(payload)
+        job = self._in_flight.get(key)
+        if job is not None:
+            job.submissions += 1
+        else:
+            job = Job(key, payload)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            task = asyncio.ensure_future(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        await job.finished.wait()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        running = sum(1 for job in self._in_flight.values() if job.status == "running")
+        return {
+            "queued": len(self._in_flight) - running,
+            "running": running,
+            "retained": len(self._finished)
+        }
+
+    def job_key(self, payload: Dict) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First use, or the previous event loop has gone away (e.g. between
+        # test clients); jobs bound to the old loop can no longer run
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._in_flight.clear()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        # Workers are started from whichever request came first; only the
+        # jobs themselves run in their submitter's context
+        telemetry.detach()
+        while True:
+            job = await self._queue.get()
+            telemetry.record("jobs.queue_wait", time.time() - job.created_at)
+            await self._execute(job)
+
+    async def _execute(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        job.started.set()
+        try:
+            job.result = await job.context.run(asyncio.ensure_future, self._run(job))
+            job.status = "succeeded"
+        except Exception as e:
+            job.status = "failed"
+            job.error = self.describe_error(e)
+        finally:
+            if job.status == "running":
+                job.status = "failed"
+                job.error = {"detail": "cancelled"}
+            job.finished_at = time.time()
+            self._in_flight.pop(job.key, None)
+            self._finished.append(job)
+            job.finished.set()
+
+    async def _run(self, job: Job) -> Any:
+        with telemetry.span("jobs.run", submissions=job.submissions):
+            return await self.run(job.payload)
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        while self._finished and self._finished[0].finished_at < cutoff:
+            self._jobs.pop(self._finished.popleft().id, None)
\ No newline at end of file
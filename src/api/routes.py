@@ -1,40 +1,445 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, List, Literal, Dict, Optional, Tuple
 from pydantic import BaseModel
-from ..agents.research_agent import ResearchAgent
-from ..agents.task_planner import TaskPlanner
+from starlette.background import BackgroundTask
+import asyncio
+import os
+from .. import telemetry
+from ..agents.analysis_store import get_analysis_store
+from ..config import get_settings
+from ..llm.cache import get_completion_cache
+from ..llm.gateway import LLMQueueFullError, get_gateway
+from ..tools.pdf_extraction import PDFSource
+from ..tools.pdf_fetcher import arxiv_pdf_url, get_pdf_fetcher
+from .jobs import Job, JobQueue, JobQueueFullError
+from .streaming import merge_streams, sse_event
+from .uploads import SpooledUpload, UploadTooLargeError, remove_spooled, spool_upload
+from .warmup import Lazy, Warmup
 
 router = APIRouter()
-research_agent = ResearchAgent()
-task_planner = TaskPlanner()
+
+# The agent stack pulls in langchain, scholarly and arxiv; import and build
+# it on first use (or during warm-up) rather than at import time
+def _build_research_agent():
+    from ..agents.research_agent import ResearchAgent
+    return ResearchAgent()
+
+def _build_task_planner():
+    from ..agents.task_planner import TaskPlanner
+    return TaskPlanner()
+
+research_agent = Lazy("research_agent", _build_research_agent)
+task_planner = Lazy("task_planner", _build_task_planner)
+
+@lru_cache()
+def get_warmup() -> Warmup:
+    settings = get_settings()
+    return Warmup(
+        {"research_agent": research_agent, "task_planner": task_planner},
+        preload=get_gateway().preload if settings.WARMUP_PRELOAD_MODEL else None
+    )
 
 class ResearchRequest(BaseModel):
     topic: str
     max_papers: int = 10
+    seed_searches: bool = False
+    # "agent" runs the ReAct agent; "pipeline" searches, reads and summarizes
+    # the top papers and compares them, with a fixed number of LLM calls
+    mode: Literal["agent", "pipeline"] = "agent"
+
+async def _run_stage(stage: Awaitable[Any], timeout: float) -> Tuple[Optional[Any], Optional[Exception]]:
+    """Await a pipeline stage, returning (result, error) instead of raising"""
+    try:
+        return await asyncio.wait_for(stage, timeout), None
+    except asyncio.TimeoutError:
+        return None, TimeoutError(f"timed out after {timeout}s")
+    except Exception as e:
+        return None, e
+
+async def _plan_and_seed(topic: str, max_papers: int) -> Dict:
+    """Create a plan and search papers for its research questions in parallel"""
+    plan = await (await task_planner.aget()).create_plan(topic)
+    questions = [
+        question.lstrip("-*0123456789.) ").strip()
+        for question in plan["research_questions"]
+    ]
+    questions = [question for question in questions if question]
+    plan["related_papers"] = await (await research_agent.aget()).search_questions(
+        questions[:get_settings().RESEARCH_SEED_QUESTIONS],
+        max_results=max_papers
+    )
+    return plan
+
+async def _conduct_research(payload: Dict) -> Dict:
+    """Plan and research a topic, raising HTTPException when both stages fail"""
+    request = ResearchRequest(**payload)
+    timeout = get_settings().RESEARCH_STAGE_TIMEOUT
+    planner, agent = await asyncio.gather(task_planner.aget(), research_agent.aget())
+    if request.seed_searches:
+        planning = _plan_and_seed(request.topic, request.max_papers)
+    else:
+        planning = planner.create_plan(request.topic)
+    
+    if request.mode == "pipeline":
+        research = agent.research_pipeline(request.topic, max_papers=request.max_papers)
+    else:
+        research = agent.research(request.topic)
+    
+    # Planning and research are independent, so run them side by side
+    (plan, plan_error), (results, research_error) = await asyncio.gather(
+        _run_stage(planning, timeout),
+        _run_stage(research, timeout)
+    )
+    
+    if plan_error and research_error:
+        if isinstance(plan_error, LLMQueueFullError) or isinstance(research_error, LLMQueueFullError):
+            raise HTTPException(status_code=429, detail="LLM queue is full", headers={"Retry-After": "5"})
+        raise HTTPException(
+            status_code=500,
+            detail=f"planning failed: {plan_error}; research failed: {research_error}"
+        )
+    
+    response = {
+        "plan": plan,
+        "results": results
+    }
+    errors = {
+        stage: str(error)
+        for stage, error in (("plan", plan_error), ("results", research_error))
+        if error
+    }
+    if errors:
+        response["errors"] = errors
+    return response
+
+def _job_error(error: Exception) -> Dict:
+    if isinstance(error, HTTPException):
+        return {"status_code": error.status_code, "detail": error.detail}
+    return {"status_code": 500, "detail": str(error)}
+
+@lru_cache()
+def _research_jobs() -> JobQueue:
+    settings = get_settings()
+    return JobQueue(
+        _conduct_research,
+        workers=settings.JOB_WORKERS,
+        max_pending=settings.JOB_MAX_PENDING,
+        retention=settings.JOB_RETENTION_SECONDS,
+        describe_error=_job_error
+    )
+
+def _job_key(jobs: JobQueue, payload: Dict) -> str:
+    # Topics that differ only in case or spacing are the same job
+    return jobs.job_key({**payload, "topic": " ".join(payload["topic"].split()).lower()})
+
+def _submit(request: ResearchRequest) -> Tuple[Job, bool]:
+    jobs = _research_jobs()
+    payload = request.model_dump()
+    try:
+        return jobs.submit(payload, key=_job_key(jobs, payload))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
 
 @router.post("/research")
 async def conduct_research(request: ResearchRequest):
-    """Conduct research on a given topic"""
+    """Conduct research on a given topic.
+
+    Runs as a research job, so identical concurrent requests share one
+    execution. It starts right away rather than waiting for a job worker;
+    see /research/jobs to avoid holding the connection open.
+    """
+    jobs = _research_jobs()
+    payload = request.model_dump()
+    job = await jobs.run_now(payload, key=_job_key(jobs, payload))
+    if job.status != "succeeded":
+        status_code = job.error.get("status_code", 500)
+        headers = {"Retry-After": "5"} if status_code == 429 else None
+        raise HTTPException(status_code=status_code, detail=job.error["detail"], headers=headers)
+    return job.result
+
+@router.post("/research/jobs", status_code=202)
+async def submit_research_job(request: ResearchRequest):
+    """Queue research on a topic and return a job id to poll or subscribe to"""
+    job, joined = _submit(request)
+    return {**job.as_dict(), "deduplicated": joined}
+
+def _job(job_id: str) -> Job:
+    job = _research_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+@router.get("/research/jobs/{job_id}")
+async def get_research_job(job_id: str, wait: float = 0.0):
+    """Job status and, once finished, its result; wait up to ``wait`` seconds for it to finish"""
+    job = _job(job_id)
+    if wait > 0 and not job.finished.is_set():
+        try:
+            await asyncio.wait_for(job.finished.wait(), min(wait, 60.0))
+        except asyncio.TimeoutError:
+            pass
+    return job.as_dict()
+
+async def _job_events(job: Job) -> AsyncIterator[str]:
+    async for event, data in job.events():
+        yield sse_event(event, data)
+    yield sse_event("done", {})
+
+@router.get("/research/jobs/{job_id}/events")
+async def research_job_events(job_id: str):
+    """Stream a job's status changes and result as server-sent events"""
+    return StreamingResponse(_job_events(_job(job_id)), media_type="text/event-stream")
+
+async def _plan_events(topic: str) -> AsyncIterator[Tuple[str, Any]]:
+    yield "plan", await (await task_planner.aget()).create_plan(topic)
+
+async def _research_events(request: ResearchRequest) -> AsyncIterator[str]:
+    agent = await research_agent.aget()
+    if request.mode == "pipeline":
+        research = agent.research_pipeline_stream(request.topic, max_papers=request.max_papers)
+    else:
+        research = agent.research_stream(request.topic)
+    async for event, data in merge_streams(_plan_events(request.topic), research):
+        yield sse_event(event, data)
+    yield sse_event("done", {})
+
+@router.post("/research/stream")
+async def conduct_research_stream(request: ResearchRequest):
+    """Conduct research, streaming plan, search results and agent steps (or papers) as server-sent events"""
+    return StreamingResponse(_research_events(request), media_type="text/event-stream")
+
+async def _spool(file: UploadFile) -> SpooledUpload:
+    """Stream an upload to disk, rejecting it once it exceeds MAX_UPLOAD_BYTES"""
+    settings = get_settings()
     try:
-        # Create research plan
-        plan = await task_planner.create_plan(request.topic)
-        
-        # Execute research
-        results = await research_agent.research(request.topic)
-        
-        return {
-            "plan": plan,
-            "results": results
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        with telemetry.span("upload.spool") as current:
+            upload = await spool_upload(
+                file,
+                max_bytes=settings.MAX_UPLOAD_BYTES,
+                chunk_size=settings.UPLOAD_CHUNK_BYTES,
+                directory=settings.UPLOAD_TMP_DIR
+            )
+            current.set(bytes=upload.size)
+            return upload
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
 @router.post("/upload-paper")
 async def upload_paper(file: UploadFile = File(...)):
     """Upload and analyze a research paper"""
+    upload = await _spool(file)
     try:
-        content = await file.read()
-        results = await research_agent.analyze_paper(content)
+        results = await (await research_agent.aget()).analyze_paper(upload.pdf, content_hash=upload.sha256)
         return results
+    except LLMQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spooled(upload.path)
+
+async def _analysis_events(upload: SpooledUpload) -> AsyncIterator[str]:
+    try:
+        agent = await research_agent.aget()
+        async for event, data in agent.analyze_paper_stream(upload.pdf, content_hash=upload.sha256):
+            yield sse_event(event, data)
+    except Exception as e:
+        yield sse_event("error", {"message": str(e)})
+    yield sse_event("done", {})
+
+@router.post("/upload-paper/stream")
+async def upload_paper_stream(file: UploadFile = File(...)):
+    """Upload a research paper and stream its analysis as server-sent events"""
+    upload = await _spool(file)
+    # A background task runs even if the client disconnects before the
+    # stream starts, when the generator's own cleanup would never run
+    return StreamingResponse(
+        _analysis_events(upload),
+        media_type="text/event-stream",
+        background=BackgroundTask(remove_spooled, upload.path)
+    )
+
+async def _summarize_source(
+    source: str,
+    load: Callable[[], AsyncContextManager[Tuple[PDFSource, Optional[str]]]],
+    limit: asyncio.Semaphore
+) -> Dict:
+    """Load and summarize one paper, reporting failure in the result instead of raising"""
+    async def summarize():
+        async with load() as (content, content_hash):
+            return await (await research_agent.aget()).summarize_paper(content, content_hash=content_hash)
+    
+    async with limit:
+        summary, error = await _run_stage(summarize(), get_settings().RESEARCH_STAGE_TIMEOUT)
+    if error:
+        return {"source": source, "error": str(error), "queue_full": isinstance(error, LLMQueueFullError)}
+    return {"source": source, **summary}
+
+def _load_upload(upload: SpooledUpload) -> Callable[[], AsyncContextManager[Tuple[PDFSource, Optional[str]]]]:
+    @asynccontextmanager
+    async def load():
+        # The request handler removes uploads once every paper is done
+        yield upload.pdf, upload.sha256
+    return load
+
+def _load_arxiv(arxiv_id: str) -> Callable[[], AsyncContextManager[Tuple[PDFSource, Optional[str]]]]:
+    @asynccontextmanager
+    async def load():
+        with telemetry.span("fetch.arxiv"):
+            pdf = await get_pdf_fetcher().afetch_file(arxiv_pdf_url(arxiv_id), get_settings().UPLOAD_TMP_DIR)
+        try:
+            yield pdf, None
+        finally:
+            remove_spooled(pdf.path)
+    return load
+
+@router.post("/compare-papers")
+async def compare_papers(files: List[UploadFile] = File(default=[]), arxiv_ids: List[str] = Form(default=[])):
+    """Summarize many uploaded PDFs and/or arXiv papers in parallel and compare them"""
+    settings = get_settings()
+    arxiv_ids = [arxiv_id.strip() for arxiv_id in arxiv_ids if arxiv_id.strip()]
+    count = len(files) + len(arxiv_ids)
+    if count == 0:
+        raise HTTPException(status_code=400, detail="Provide at least one file or arXiv id")
+    if count > settings.COMPARE_MAX_PAPERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.COMPARE_MAX_PAPERS} papers per request")
+    
+    uploads = []
+    try:
+        for file in files:
+            uploads.append((file.filename, await _spool(file)))
+        
+        # Parsing is bounded by the PDF process pool and LLM calls by the
+        # gateway queue; this only caps how many papers are held at once
+        limit = asyncio.Semaphore(settings.COMPARE_MAX_CONCURRENCY)
+        papers = await asyncio.gather(
+            *(_summarize_source(filename, _load_upload(upload), limit) for filename, upload in uploads),
+            *(_summarize_source(arxiv_id, _load_arxiv(arxiv_id), limit) for arxiv_id in arxiv_ids)
+        )
+    finally:
+        for _, upload in uploads:
+            remove_spooled(upload.path)
+    
+    summarized = [paper for paper in papers if "error" not in paper]
+    if not summarized:
+        if any(paper["queue_full"] for paper in papers):
+            raise HTTPException(status_code=429, detail="LLM queue is full", headers={"Retry-After": "5"})
+        raise HTTPException(status_code=500, detail="; ".join(f"{paper['source']}: {paper['error']}" for paper in papers))
+    for paper in papers:
+        paper.pop("queue_full", None)
+    
+    comparison = None
+    if len(summarized) > 1:
+        try:
+            comparison = await (await research_agent.aget()).compare_papers(summarized)
+        except LLMQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "papers": papers,
+        "comparison": comparison
+    }
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage timings, token counts, prompt sizes and cache hit rates"""
+    gateway_stats = get_gateway().stats()
+    for state in ("active", "queued"):
+        telemetry.LLM_QUEUE.set(gateway_stats[state], state=state)
+    for state, count in _research_jobs().stats().items():
+        telemetry.JOBS.set(count, state=state)
+    telemetry.observe_cache("completion", get_completion_cache().stats())
+    if research_agent.ready:
+        # Only once the agent stack is loaded, so a scrape never pays for the import
+        from ..tools.paper_search import get_search_cache
+        telemetry.observe_cache("search", get_search_cache().stats())
+    telemetry.observe_cache("analysis", get_analysis_store().cache.stats())
+    return PlainTextResponse(telemetry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Spans of a recent request traced with X-Trace: 1 (or TRACE_REQUESTS)"""
+    trace = telemetry.get_trace_buffer().get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired trace: {trace_id}")
+    return trace.as_dict()
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """Report LLM gateway queue and run-time metrics"""
+    return {
+        **get_gateway().stats(),
+        "completion_cache": get_completion_cache().stats()
+    }
+
+@router.get("/ready")
+async def ready():
+    """Readiness probe: 503 until warm-up has built the agents and loaded the model"""
+    warmup = get_warmup()
+    return JSONResponse(
+        status_code=200 if warmup.ready() else 503,
+        content={"ready": warmup.ready(), "components": warmup.status()}
+    )
+
+class IngestRequest(BaseModel):
+    directory: str
+
+@lru_cache()
+def _directory_ingestor():
+    from ..rag.directory_ingestor import create_directory_ingestor
+    from ..rag.ingestion import create_pipeline
+    from ..rag.retriever import get_retriever
+    # Ingest through the retriever so new chunks reach the BM25 index as well as the store
+    return create_directory_ingestor(create_pipeline(get_retriever()))
+
+def _retriever():
+    from ..rag.retriever import get_retriever
+    return get_retriever()
+
+def _ingest_directory(requested: str) -> str:
+    """Resolve a requested directory against INGEST_ROOT, refusing anything outside it"""
+    root = get_settings().INGEST_ROOT
+    if not root:
+        raise HTTPException(status_code=403, detail="Directory ingestion is disabled; set INGEST_ROOT to enable it")
+    root = os.path.realpath(root)
+    directory = os.path.realpath(os.path.join(root, requested))
+    if os.path.commonpath([root, directory]) != root:
+        raise HTTPException(status_code=403, detail=f"{requested} is outside INGEST_ROOT")
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=400, detail=f"Not a directory: {requested}")
+    return directory
+
+@router.post("/ingest")
+async def ingest_directory(request: IngestRequest):
+    """Index new and changed PDFs in a directory under INGEST_ROOT and drop removed ones"""
+    directory = _ingest_directory(request.directory)
+    loop = asyncio.get_running_loop()
+    try:
+        with telemetry.span("ingest.sync"):
+            # Building the ingestor loads the embedding stack, so keep that off the loop too
+            return await loop.run_in_executor(None, lambda: _directory_ingestor().sync(directory))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class SearchRequest(BaseModel):
+    query: str
+    top_k: int = 5
+
+@router.post("/search")
+async def search(request: SearchRequest):
+    """Hybrid BM25 and vector search over the ingested chunks"""
+    loop = asyncio.get_running_loop()
+    try:
+        with telemetry.span("retriever.search") as current:
+            # Building the retriever loads the embedder and indexes the store, so keep that off the loop
+            retriever = await loop.run_in_executor(None, _retriever)
+            results = await retriever.aretrieve(request.query, request.top_k)
+            current.set(results=len(results))
+        return {"query": request.query, "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
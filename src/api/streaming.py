@@ -0,0 +1,39 @@
+from typing import Any, AsyncIterator, Tuple
+import asyncio
+import json
+
+_STREAM_DONE = object()
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def merge_streams(*streams: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[Tuple[str, Any]]:
+    """Interleave several (event, data) streams in arrival order.
+
+    A failing stream is reported as an ``error`` event without stopping
+    the others.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def pump(stream: AsyncIterator[Tuple[str, Any]]):
+        try:
+            async for item in stream:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(("error", {"message": str(e)}))
+        finally:
+            await queue.put(_STREAM_DONE)
+    
+    tasks = [asyncio.ensure_future(pump(stream)) for stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
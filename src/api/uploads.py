@@ -0,0 +1,51 @@
+from fastapi import UploadFile
+from typing import NamedTuple, Optional
+import asyncio
+import hashlib
+import os
+import tempfile
+from ..tools.pdf_extraction import PDFFile
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+class SpooledUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+    @property
+    def pdf(self) -> PDFFile:
+        return PDFFile(self.path)
+
+async def spool_upload(file: UploadFile, max_bytes: int, chunk_size: int, directory: Optional[str] = None) -> SpooledUpload:
+    """Stream an upload to a temporary file chunk by chunk, hashing it on the way.
+
+    Only one chunk is held in memory at a time. The caller owns the file
+    and must remove it.
+    """
+    loop = asyncio.get_running_loop()
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spooled:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                await loop.run_in_executor(None, spooled.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, size, digest.hexdigest())
+
+def remove_spooled(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+import asyncio
+import threading
+import time
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    """A component built on first use, exactly once, from any thread.
+
+    Keeps heavy imports and construction out of module import so the API
+    process can bind its port before the agent stack is loaded.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self.state = "cold"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "warm"
+
+    def get(self) -> T:
+        if self.state == "warm":
+            return self._value
+        with self._lock:
+            if self.state != "warm":
+                self.state = "warming"
+                started = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.state = "failed"
+                    self.error = str(e)
+                    raise
+                self.seconds = time.perf_counter() - started
+                self.error = None
+                self.state = "warm"
+        return self._value
+
+    async def aget(self) -> T:
+        """Like get, but builds a cold component in the default executor"""
+        if self.state == "warm":
+            return self._value
+        return await asyncio.get_running_loop().run_in_executor(None, self.get)
+
+    def status(self) -> Dict[str, Any]:
+        status = {"state": self.state}
+        if self.seconds is not None:
+            status["seconds"] = round(self.seconds, 3)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+class Warmup:
+    """Builds components and preloads the model on a background thread.
+
+    A component that fails to build is retried with exponential backoff,
+    from ``backoff`` up to ``max_backoff`` seconds, until it builds. A
+    failed model preload is not retried; the first request loads it.
+    """
+
+    def __init__(
+        self,
+        components: Dict[str, Lazy],
+        preload: Optional[Callable[[], None]] = None,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        self.components = components
+        self.preload = preload
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.model = Lazy("model", self._preload_model) if preload else None
+        self.started = False
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        components = {name: component.status() for name, component in self.components.items()}
+        if self.model is not None:
+            components["model"] = self.model.status()
+        return components
+
+    def ready(self) -> bool:
+        """Everything warm, or warm-up was never requested"""
+        if not self.started:
+            return True
+        return all(component.ready for component in self.components.values()) and (
+            self.model is None or self.model.state in ("warm", "failed")
+        )
+
+    def _run(self):
+        # Loading the model is Ollama's work, so overlap it with the imports
+        if self.model is not None:
+            threading.Thread(target=self._build, args=(self.model, False), name="warmup-model", daemon=True).start()
+        # One attempt each first, so a failing component does not hold up the rest
+        for component in self.components.values():
+            self._build(component, retry=False)
+        for component in self.components.values():
+            self._build(component)
+
+    def _build(self, component: Lazy, retry: bool = True):
+        delay = self.backoff
+        while True:
+            try:
+                component.get()
+                return
+            except Exception:
+                # Recorded in the component's status; requests may also retry the build
+                if not retry:
+                    return
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def _preload_model(self) -> bool:
+        self.preload()
+        return True
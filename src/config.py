@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Research Assistant"
@@ -11,6 +11,75 @@ class Settings(BaseSettings):
     MAX_PAPERS: int = 10
     OLLAMA_HOST: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "gemma"
+    ARXIV_TIMEOUT: float = 20.0
+    SCHOLAR_TIMEOUT: float = 20.0
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MEMORY_ENTRIES: int = 256
+    SEARCH_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    SEARCH_CACHE_TTL_ARXIV: float = 24 * 3600
+    SEARCH_CACHE_TTL_SCHOLAR: float = 7 * 24 * 3600
+    LLM_MAX_CONCURRENCY: int = 2
+    LLM_MAX_QUEUE: int = 64
+    LLM_POOL_SIZE: int = 8
+    LLM_REQUEST_TIMEOUT: float = 300.0
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MEMORY_ENTRIES: int = 512
+    LLM_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    RESEARCH_STAGE_TIMEOUT: float = 600.0
+    RESEARCH_SEED_QUESTIONS: int = 3
+    RESEARCH_PIPELINE_PAPERS: int = 5
+    PDF_WORKERS: Optional[int] = None
+    PDF_PAGES_PER_TASK: int = 25
+    PDF_PARSE_TIMEOUT: float = 120.0
+    MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_TMP_DIR: Optional[str] = None
+    ANALYSIS_STORE_MEMORY_ENTRIES: int = 128
+    ANALYSIS_STORE_MAX_BYTES: int = 500 * 1024 * 1024
+    RETRIEVER_LEXICAL_K: int = 20
+    RETRIEVER_VECTOR_K: int = 20
+    RETRIEVER_RRF_K: int = 60
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    INGEST_UPSERT_BATCH_SIZE: int = 512
+    VECTOR_STORE_BACKEND: str = "chroma"
+    FAISS_INDEX_TYPE: str = "flat"
+    FAISS_NLIST: int = 256
+    FAISS_NPROBE: int = 8
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_SEARCH: int = 128
+    FAISS_MMAP: bool = True
+    FAISS_SAVE_EVERY: int = 10000
+    FAISS_QUANTIZATION: str = "none"
+    FAISS_PQ_M: int = 16
+    FAISS_RERANK_FACTOR: int = 4
+    INGEST_WORKERS: Optional[int] = None
+    INGEST_ROOT: Optional[str] = None
+    SUMMARY_CHUNK_TOKENS: int = 3000
+    SUMMARY_MAX_CONCURRENCY: int = 4
+    COMPARE_MAX_PAPERS: int = 100
+    COMPARE_MAX_CONCURRENCY: int = 8
+    COMPARE_MAX_BYTES: int = 256 * 1024 * 1024
+    PDF_FETCH_TIMEOUT: float = 60.0
+    PDF_FETCH_MAX_BYTES: int = 50 * 1024 * 1024
+    PDF_FETCH_PER_HOST: int = 10
+    PDF_FETCH_POOL_SIZE: int = 32
+    PDF_FETCH_RETRIES: int = 3
+    PDF_FETCH_BACKOFF: float = 0.5
+    PDF_FETCH_ALLOWED_HOSTS: List[str] = ["arxiv.org"]
+    PDF_CACHE_ENABLED: bool = True
+    PDF_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    PDF_CACHE_FRESH_SECONDS: float = 7 * 24 * 3600
+    TRACE_REQUESTS: bool = False
+    TRACE_BUFFER_SIZE: int = 200
+    JOB_WORKERS: int = 2
+    JOB_MAX_PENDING: int = 100
+    JOB_RETENTION_SECONDS: float = 3600.0
+    OLLAMA_KEEP_ALIVE: Optional[str] = "30m"
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_PRELOAD_MODEL: bool = True
+    ANALYSIS_CONTEXT_TOKENS: Optional[int] = 3000
+    ANALYSIS_TOP_K: int = 4
     
     class Config:
         env_file = ".env"
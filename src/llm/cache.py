@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import List, Optional
+import hashlib
+import json
+import os
+from ..cache import DiskCache, LRUCache, TieredCache
+from ..config import get_settings
+
+def completion_key(model: str, prompt: str, temperature: Optional[float], stop: Optional[List[str]] = None) -> str:
+    """Content address of a completion request"""
+    payload = json.dumps([model, prompt, temperature, stop or []], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@lru_cache()
+def get_completion_cache() -> TieredCache:
+    """Process-wide completion cache (memory LRU + size-capped SQLite under VECTOR_DB_PATH)"""
+    settings = get_settings()
+    return TieredCache(
+        LRUCache(settings.LLM_CACHE_MEMORY_ENTRIES),
+        DiskCache(
+            os.path.join(settings.VECTOR_DB_PATH, "llm_cache.sqlite"),
+            max_bytes=settings.LLM_CACHE_MAX_BYTES
+        )
+    )
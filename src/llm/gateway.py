@@ -0,0 +1,419 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import heapq
+import itertools
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from .. import telemetry
+from ..config import get_settings
+from .cache import completion_key, get_completion_cache
+
+# Lower values are scheduled first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+_END_OF_STREAM = object()
+
+class LLMQueueFullError(Exception):
+    """Raised when the gateway queue is full and the request should be retried later"""
+
+class _Waiter:
+    def __init__(self):
+        self.granted = False
+
+    def grant(self):
+        self.granted = True
+
+class _AsyncWaiter(_Waiter):
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def grant(self):
+        super().grant()
+        self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+class _ThreadWaiter(_Waiter):
+    def __init__(self):
+        super().__init__()
+        self.event = threading.Event()
+
+    def grant(self):
+        super().grant()
+        self.event.set()
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "avg_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max
+        }
+
+class LLMGateway:
+    """Process-wide access point to the Ollama daemon.
+
+    Requests go through a pooled HTTP session and a priority scheduler that
+    caps how many generations run at once. When ``max_queue`` requests are
+    already waiting, new ones are rejected with LLMQueueFullError.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        model: str,
+        max_concurrency: int = 2,
+        max_queue: int = 64,
+        pool_size: int = 8,
+        timeout: float = 300.0,
+        keep_alive: Optional[str] = None
+    ):
+        self.host = host.rstrip('/')
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-gateway")
+        
+        self._lock = threading.Lock()
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._rejected = 0
+        self._queue_time = _Timing()
+        self._run_time = _Timing()
+
+    async def generate(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_NORMAL,
+        options: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        use_cache: bool = True
+    ) -> str:
+        """Generate a completion, waiting for a free slot in priority order.
+
+        Cached completions are returned without queueing; pass
+        ``use_cache=False`` for calls whose output must not be reused.
+        """
+        loop = asyncio.get_running_loop()
+        telemetry.PROMPT_CHARS.observe(len(prompt), priority=priority)
+        key = self._cache_key(prompt, options, stop) if use_cache else None
+        if key is not None:
+            with telemetry.span("llm.cache_lookup") as lookup:
+                cached = await loop.run_in_executor(None, get_completion_cache().get, key)
+                lookup.set(hit=cached is not None)
+            if cached is not None:
+                return cached
+        
+        with telemetry.span("llm.queue", priority=priority):
+            await self._acquire(priority)
+        try:
+            with telemetry.span("llm.generate", prompt_chars=len(prompt)) as generation:
+                text = await loop.run_in_executor(
+                    self._executor, telemetry.in_context(self._timed_request), prompt, options, stop
+                )
+                generation.set(response_chars=len(text))
+        finally:
+            self._release()
+        
+        if key is not None:
+            await loop.run_in_executor(None, get_completion_cache().set, key, text)
+        return text
+
+    def generate_sync(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_NORMAL,
+        options: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        use_cache: bool = True
+    ) -> str:
+        """Blocking variant of generate for synchronous callers"""
+        telemetry.PROMPT_CHARS.observe(len(prompt), priority=priority)
+        key = self._cache_key(prompt, options, stop) if use_cache else None
+        if key is not None:
+            with telemetry.span("llm.cache_lookup") as lookup:
+                cached = get_completion_cache().get(key)
+                lookup.set(hit=cached is not None)
+            if cached is not None:
+                return cached
+        
+        with telemetry.span("llm.queue", priority=priority):
+            self._acquire_sync(priority)
+        try:
+            with telemetry.span("llm.generate", prompt_chars=len(prompt)) as generation:
+                text = self._timed_request(prompt, options, stop)
+                generation.set(response_chars=len(text))
+        finally:
+            self._release()
+        
+        if key is not None:
+            get_completion_cache().set(key, text)
+        return text
+
+    async def astream(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_NORMAL,
+        options: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream a completion chunk by chunk as Ollama generates it.
+
+        A cached completion is yielded as a single chunk. The slot is held
+        until the underlying HTTP stream is closed, even if the consumer
+        stops iterating early.
+        """
+        loop = asyncio.get_running_loop()
+        telemetry.PROMPT_CHARS.observe(len(prompt), priority=priority)
+        key = self._cache_key(prompt, options, stop) if use_cache else None
+        if key is not None:
+            with telemetry.span("llm.cache_lookup") as lookup:
+                cached = await loop.run_in_executor(None, get_completion_cache().get, key)
+                lookup.set(hit=cached is not None)
+            if cached is not None:
+                yield cached
+                return
+        
+        with telemetry.span("llm.queue", priority=priority):
+            await self._acquire(priority)
+        chunks: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        
+        def produce():
+            started = time.perf_counter()
+            try:
+                # The whole stream runs on this thread, so the span can wrap it
+                with telemetry.span("llm.generate", prompt_chars=len(prompt), stream=True):
+                    for chunk in self._stream_request(prompt, options, stop, cancelled):
+                        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                loop.call_soon_threadsafe(chunks.put_nowait, _END_OF_STREAM)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                with self._lock:
+                    self._run_time.observe(time.perf_counter() - started)
+                self._release()
+        
+        try:
+            loop.run_in_executor(self._executor, telemetry.in_context(produce))
+        except BaseException:
+            self._release()
+            raise
+        
+        parts = []
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _END_OF_STREAM:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                parts.append(chunk)
+                yield chunk
+        finally:
+            cancelled.set()
+        
+        if key is not None:
+            await loop.run_in_executor(None, get_completion_cache().set, key, "".join(parts))
+
+    def preload(self):
+        """Load the model into Ollama's memory without generating anything.
+
+        Ollama loads a model on a generate call with no prompt; keep_alive
+        controls how long it stays resident afterwards.
+        """
+        response = self.session.post(
+            f"{self.host}/api/generate",
+            json=self._payload({"model": self.model}),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": len(self._waiters),
+                "rejected": self._rejected,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_time": self._queue_time.as_dict(),
+                "run_time": self._run_time.as_dict()
+            }
+
+    def _cache_key(self, prompt: str, options: Optional[Dict[str, Any]], stop: Optional[List[str]]) -> Optional[str]:
+        if not get_settings().LLM_CACHE_ENABLED:
+            return None
+        return completion_key(self.model, prompt, (options or {}).get("temperature"), stop)
+
+    def _timed_request(self, prompt: str, options: Optional[Dict[str, Any]], stop: Optional[List[str]]) -> str:
+        started = time.perf_counter()
+        try:
+            return self._request(prompt, options, stop)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._run_time.observe(elapsed)
+
+    def _request(self, prompt: str, options: Optional[Dict[str, Any]], stop: Optional[List[str]]) -> str:
+        """Call Ollama's generate API over the pooled session"""
+        request_options = dict(options or {})
+        if stop:
+            request_options["stop"] = stop
+        response = self.session.post(
+            f"{self.host}/api/generate",
+            json=self._payload({
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+                "options": request_options
+            }),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        telemetry.count_tokens(data.get("prompt_eval_count", 0), data.get("eval_count", 0))
+        return data.get("response", "")
+
+    def _stream_request(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]],
+        stop: Optional[List[str]],
+        cancelled: threading.Event
+    ) -> Iterator[str]:
+        """Call Ollama's generate API in streaming mode, yielding response chunks"""
+        request_options = dict(options or {})
+        if stop:
+            request_options["stop"] = stop
+        with self.session.post(
+            f"{self.host}/api/generate",
+            json=self._payload({
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True,
+                "options": request_options
+            }),
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if cancelled.is_set():
+                    break
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    telemetry.count_tokens(data.get("prompt_eval_count", 0), data.get("eval_count", 0))
+                    break
+
+    def _payload(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if self.keep_alive:
+            body["keep_alive"] = self.keep_alive
+        return body
+
+    def _try_acquire(self, priority: int, waiter: _Waiter) -> bool:
+        """Take a slot if one is free, otherwise enqueue the waiter"""
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self._queue_time.observe(0.0)
+                return True
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                telemetry.LLM_REJECTED.inc()
+                raise LLMQueueFullError(
+                    f"LLM queue is full ({self.max_queue} requests waiting)"
+                )
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            return False
+
+    async def _acquire(self, priority: int):
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        if self._try_acquire(priority, waiter):
+            return
+        
+        enqueued = time.perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        with self._lock:
+            self._queue_time.observe(time.perf_counter() - enqueued)
+
+    def _acquire_sync(self, priority: int):
+        waiter = _ThreadWaiter()
+        if self._try_acquire(priority, waiter):
+            return
+        
+        enqueued = time.perf_counter()
+        waiter.event.wait()
+        with self._lock:
+            self._queue_time.observe(time.perf_counter() - enqueued)
+
+    def _abandon(self, waiter: _Waiter):
+        """Drop a cancelled waiter, handing back its slot if it was already granted"""
+        with self._lock:
+            if not waiter.granted:
+                self._waiters = [entry for entry in self._waiters if entry[2] is not waiter]
+                heapq.heapify(self._waiters)
+                return
+        self._release()
+
+    def _release(self):
+        """Pass the slot to the highest-priority waiter, or free it"""
+        with self._lock:
+            if self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                waiter.grant()
+            else:
+                self._active -= 1
+
+@lru_cache()
+def get_gateway() -> LLMGateway:
+    """Process-wide LLM gateway configured from settings"""
+    settings = get_settings()
+    return LLMGateway(
+        host=settings.OLLAMA_HOST,
+        model=settings.OLLAMA_MODEL,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        max_queue=settings.LLM_MAX_QUEUE,
+        pool_size=settings.LLM_POOL_SIZE,
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE
+    )
@@ -0,0 +1,55 @@
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from typing import Any, AsyncIterator, Dict, List, Optional
+from .gateway import PRIORITY_NORMAL, get_gateway
+
+class GatewayLLM(LLM):
+    """LangChain LLM that routes every call through the shared LLMGateway"""
+
+    priority: int = PRIORITY_NORMAL
+    temperature: Optional[float] = None
+    use_cache: bool = True
+    """Reuse completions for identical prompts; disable for non-deterministic calls"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-gateway"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"priority": self.priority, "temperature": self.temperature, "use_cache": self.use_cache}
+
+    def _options(self) -> Dict[str, Any]:
+        return {"temperature": self.temperature} if self.temperature is not None else {}
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        return get_gateway().generate_sync(prompt, self.priority, self._options(), stop, self.use_cache)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        return await get_gateway().generate(prompt, self.priority, self._options(), stop, self.use_cache)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[GenerationChunk]:
+        async for text in get_gateway().astream(prompt, self.priority, self._options(), stop, self.use_cache):
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Optional
+from ..config import get_settings
+
+def create_vector_store(persist_directory: Optional[str] = None, backend: Optional[str] = None):
+    """Create the vector store backend selected by VECTOR_STORE_BACKEND.
+
+    Backends are imported lazily so only the selected one needs to be
+    installed.
+    """
+    settings = get_settings()
+    backend = backend or settings.VECTOR_STORE_BACKEND
+    if persist_directory is None:
+        persist_directory = settings.VECTOR_DB_PATH
+    
+    if backend == "faiss":
+        from .faiss_store import FaissVectorStore
+        return FaissVectorStore(
+            persist_directory or None,
+            index_type=settings.FAISS_INDEX_TYPE,
+            nlist=settings.FAISS_NLIST,
+            nprobe=settings.FAISS_NPROBE,
+            hnsw_m=settings.FAISS_HNSW_M,
+            hnsw_ef_search=settings.FAISS_HNSW_EF_SEARCH,
+            mmap=settings.FAISS_MMAP,
+            save_every=settings.FAISS_SAVE_EVERY,
+            quantization=settings.FAISS_QUANTIZATION,
+            pq_m=settings.FAISS_PQ_M,
+            rerank_factor=settings.FAISS_RERANK_FACTOR
+        )
+    if backend == "chroma":
+        from .vector_store import VectorStore
+        return VectorStore(persist_directory)
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+@lru_cache()
+def get_vector_store():
+    """Process-wide vector store at VECTOR_DB_PATH"""
+    return create_vector_store()
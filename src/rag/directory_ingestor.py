@@ -0,0 +1,189 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+import argparse
+import json
+import os
+import threading
+import time
+from ..config import get_settings
+from ..tools.pdf_extraction import PDFFile, fingerprint
+from .document_proccesor import DocumentProcessor
+from .ingestion import IngestionPipeline
+
+def chunk_file(path: str) -> Tuple[str, str, List[Dict]]:
+    """Hash and chunk one PDF; runs inside a pool worker"""
+    return path, fingerprint(PDFFile(path)), DocumentProcessor().process_pdf(path)
+
+class DirectoryIngestor:
+    """Keeps a directory of PDFs in sync with a vector store.
+
+    A JSON manifest records each file's mtime, size, content hash and chunk
+    ids. Files whose mtime and size are unchanged are skipped without
+    being read; touched files whose hash is unchanged are not re-chunked.
+    New and changed files are chunked in a process pool and embedded through
+    the ingestion pipeline. Chunks of deleted or changed files are removed
+    from the store unless another file still uses them.
+    """
+
+    def __init__(self, pipeline: IngestionPipeline, manifest_path: str, workers: Optional[int] = None):
+        self.pipeline = pipeline
+        self.manifest_path = manifest_path
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+        self._lock = threading.Lock()
+
+    def sync(self, directory: str) -> Dict:
+        """Bring the store up to date with a directory; concurrent calls run one at a time"""
+        with self._lock:
+            return self._sync(directory)
+
+    def _sync(self, directory: str) -> Dict:
+        started = time.perf_counter()
+        files = {
+            os.path.abspath(os.path.join(root, name)): None
+            for root, _, names in os.walk(directory)
+            for name in names
+            if name.lower().endswith(".pdf")
+        }
+        for path in files:
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime, stat.st_size)
+        
+        directory = os.path.abspath(directory)
+        removed = [
+            path for path in self.manifest
+            if path.startswith(directory + os.sep) and path not in files
+        ]
+        unchanged, touched, pending = self._classify(files)
+        
+        # Chunks of superseded versions, dropped once the new chunks are stored
+        stale: Set[str] = set()
+        for path in removed:
+            stale.update(self.manifest[path]['chunk_ids'])
+        
+        # The manifest only changes once ingestion succeeds, so a failed sync
+        # leaves removed files listed and their chunks are retried next time
+        new_entries: Dict[str, Dict] = {}
+        report = self.pipeline.ingest(self._chunks(pending, files, new_entries, stale))
+        for path in removed:
+            del self.manifest[path]
+        self.manifest.update(new_entries)
+        
+        in_use = {chunk_id for entry in self.manifest.values() for chunk_id in entry['chunk_ids']}
+        deleted = sorted(stale - in_use)
+        if deleted:
+            self.pipeline.store.delete(deleted)
+            persist = getattr(self.pipeline.store, "persist", None)
+            if persist is not None:
+                persist()
+        self._save_manifest()
+        
+        return {
+            "files": len(files),
+            "unchanged": unchanged,
+            "touched": touched,
+            "processed": len(new_entries),
+            "removed": len(removed),
+            "chunks_deleted": len(deleted),
+            "ingestion": report,
+            "seconds": time.perf_counter() - started
+        }
+
+    def _classify(self, files: Dict[str, Tuple[float, int]]) -> Tuple[int, int, List[str]]:
+        """Split files into unchanged, touched-but-identical and needing processing"""
+        unchanged = 0
+        suspects = []
+        pending = []
+        for path, (mtime, size) in files.items():
+            entry = self.manifest.get(path)
+            if entry is None:
+                pending.append(path)
+            elif entry['mtime'] == mtime and entry['size'] == size:
+                unchanged += 1
+            else:
+                suspects.append(path)
+        
+        touched = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as hashers:
+            for path, digest in zip(suspects, hashers.map(fingerprint, suspects)):
+                entry = self.manifest[path]
+                if digest == entry['sha256']:
+                    entry['mtime'], entry['size'] = files[path]
+                    touched += 1
+                else:
+                    pending.append(path)
+        return unchanged, touched, pending
+
+    def _chunks(
+        self,
+        pending: List[str],
+        files: Dict[str, Tuple[float, int]],
+        new_entries: Dict[str, Dict],
+        stale: Set[str]
+    ) -> Iterator[Dict]:
+        """Chunk pending files in worker processes, yielding chunks as each file completes.
+
+        At most twice as many files as workers are in flight, so chunked
+        text does not pile up faster than it can be embedded.
+        """
+        if not pending:
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            queue = iter(pending)
+            in_flight: Deque[Future] = deque()
+            for path in queue:
+                in_flight.append(pool.submit(chunk_file, path))
+                if len(in_flight) >= self.workers * 2:
+                    break
+            while in_flight:
+                path, digest, chunks = in_flight.popleft().result()
+                next_path = next(queue, None)
+                if next_path is not None:
+                    in_flight.append(pool.submit(chunk_file, next_path))
+                
+                previous = self.manifest.get(path)
+                if previous is not None:
+                    stale.update(previous['chunk_ids'])
+                mtime, size = files[path]
+                new_entries[path] = {
+                    'mtime': mtime,
+                    'size': size,
+                    'sha256': digest,
+                    'chunk_ids': sorted({chunk['metadata']['chunk_hash'] for chunk in chunks})
+                }
+                yield from chunks
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def _save_manifest(self):
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        os.replace(temporary, self.manifest_path)
+
+def create_directory_ingestor(pipeline: IngestionPipeline) -> DirectoryIngestor:
+    settings = get_settings()
+    return DirectoryIngestor(
+        pipeline,
+        os.path.join(settings.VECTOR_DB_PATH, "ingest_manifest.json"),
+        workers=settings.INGEST_WORKERS
+    )
+
+if __name__ == "__main__":
+    from .backends import get_vector_store
+    from .ingestion import create_pipeline
+    
+    parser = argparse.ArgumentParser(description="Incrementally index a directory of PDFs")
+    parser.add_argument("directory")
+    args = parser.parse_args()
+    
+    ingestor = create_directory_ingestor(create_pipeline(get_vector_store()))
+    print(json.dumps(ingestor.sync(args.directory), indent=2))
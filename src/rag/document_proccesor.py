@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Iterator, List, Dict
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import PyPDFLoader
 import hashlib
@@ -12,23 +12,49 @@ class DocumentProcessor:
         )
     
     def process_pdf(self, file_path: str) -> List[Dict]:
-        """Process a PDF document and return chunks with metadata"""
-        loader = PyPDFLoader(file_path)
-        pages = loader.load()
-        chunks = self.text_splitter.split_documents(pages)
-        
-        processed_chunks = []
-        for chunk in chunks:
-            chunk_text = chunk.page_content
-            chunk_hash = hashlib.md5(chunk_text.encode()).hexdigest()
+        """Process a PDF document and return chunks with metadata.
+
+        The same chunks as iter_pdf_chunks, so every ingestion path stores
+        identical chunk hashes for a file.
+        """
+        return list(self.iter_pdf_chunks(file_path))
+    
+    def process_text(self, text: str, source: str) -> List[Dict]:
+        """Split already-extracted text into chunks with metadata"""
+        return [self._chunk_record(piece, 0, source) for piece in self.text_splitter.split_text(text)]
+    
+    def iter_pdf_chunks(self, file_path: str) -> Iterator[Dict]:
+        """Yield chunks page by page without loading the whole PDF.
+
+        The last chunk of each page is held back and split again together
+        with the next page, so chunks and their overlap run across page
+        boundaries. Only one page plus one chunk is in memory at a time.
+        """
+        carry = ""
+        carry_page = 0
+        for page in PyPDFLoader(file_path).lazy_load():
+            page_number = page.metadata.get('page', 0)
+            text = f"{carry}\n{page.page_content}" if carry else page.page_content
+            pieces = self.text_splitter.split_text(text)
+            if not pieces:
+                continue
             
-            processed_chunks.append({
-                'text': chunk_text,
-                'metadata': {
-                    'page': chunk.metadata.get('page', 0),
-                    'chunk_hash': chunk_hash,
-                    'source_file': file_path
-                }
-            })
+            for i, piece in enumerate(pieces[:-1]):
+                yield self._chunk_record(piece, carry_page if carry and i == 0 else page_number, file_path)
+            if len(pieces) > 1 or not carry:
+                carry_page = page_number
+            carry = pieces[-1]
         
-        return processed_chunks
\ No newline at end of file
+        if carry:
+            yield self._chunk_record(carry, carry_page, file_path)
+    
+    def _chunk_record(self, chunk_text: str, page: int, file_path: str) -> Dict:
+        chunk_hash = hashlib.md5(chunk_text.encode()).hexdigest()
+        return {
+            'text': chunk_text,
+            'metadata': {
+                'page': page,
+                'chunk_hash': chunk_hash,
+                'source_file': file_path
+            }
+        }
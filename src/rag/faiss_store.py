@@ -0,0 +1,424 @@
+from typing import Dict, Iterator, List, Optional, Set
+import json
+import math
+import os
+import sqlite3
+import threading
+import faiss
+import numpy as np
+
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "metadata.sqlite"
+VECTORS_FILE = "vectors.f32"
+
+QUANTIZATIONS = ("none", "fp16", "sq8", "pq")
+
+# FAISS wants roughly 39 training points per inverted list
+IVF_POINTS_PER_LIST = 39
+
+# HNSW graphs are rebuilt once this share of their vectors belongs to deleted rows
+HNSW_REBUILD_RATIO = 0.25
+
+class FaissVectorStore:
+    """VectorStore backed by a FAISS index with a SQLite side store.
+
+    Exposes the same add_documents / similarity_search interface as the
+    Chroma-backed VectorStore. FAISS holds only vectors under integer row
+    ids; texts and metadata live in SQLite keyed by ``chunk_hash``.
+
+    Index types are ``flat`` (exact), ``ivf`` (inverted lists) and ``hnsw``
+    (graph). An ``ivf`` store searches exactly until ``nlist * 39`` vectors
+    have been added, then trains its lists on all of them. Stored codes can be compressed
+    with ``quantization`` set to ``fp16``, ``sq8`` (scalar int8) or ``pq``
+    (product quantization). Full-precision vectors are then kept in a
+    separate memory-mapped file, and the top ``top_k * rerank_factor``
+    candidates are re-ranked exactly against them. The index is written every
+    ``save_every`` added vectors and on save(); the SQLite rows for those
+    vectors are committed in the same step, so the two files stay
+    consistent after a crash. HNSW graphs cannot drop vectors, so deleted
+    rows stay in the graph until HNSW_REBUILD_RATIO of it is dead, when it is
+    rebuilt from the live vectors. The index type and quantization are recorded
+    with the metadata, and reopening a store with different ones is an
+    error. With ``persist_directory=None`` everything stays in memory.
+    """
+
+    def __init__(
+        self,
+        persist_directory: Optional[str] = None,
+        index_type: str = "flat",
+        nlist: int = 256,
+        nprobe: int = 8,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 128,
+        mmap: bool = True,
+        save_every: int = 10000,
+        quantization: str = "none",
+        pq_m: int = 16,
+        rerank_factor: int = 4
+    ):
+        if index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown FAISS quantization: {quantization}")
+        self.persist_directory = persist_directory
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.save_every = save_every
+        self.quantization = quantization
+        self.pq_m = pq_m
+        self.rerank_factor = rerank_factor
+        self.vectors = FullPrecisionVectors(
+            os.path.join(persist_directory, VECTORS_FILE) if persist_directory else None
+        )
+        self._lock = threading.RLock()
+        self._unsaved = 0
+        # Vectors still in an HNSW graph whose rows were deleted
+        self._deleted = 0
+        self._read_only = False
+        self.index: Optional[faiss.Index] = None
+        
+        if persist_directory:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(persist_directory, METADATA_FILE), check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chunk_hash TEXT UNIQUE NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS layout (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._check_layout({"index_type": index_type, "quantization": quantization})
+        self._conn.commit()
+        
+        index_path = self._index_path()
+        if index_path and os.path.exists(index_path):
+            if mmap:
+                # IVF inverted lists are mapped read-only; the index is
+                # reloaded writable on the first add
+                self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._read_only = True
+            else:
+                self.index = faiss.read_index(index_path)
+            self._configure(self.index)
+            self.vectors.dimension = self.index.d
+            if index_type == "hnsw":
+                self._deleted = max(0, self.index.ntotal - len(self))
+
+    def add_documents(self, documents: List[Dict], embeddings: List[List[float]]):
+        """Add documents and their embeddings to the vector store"""
+        with self._lock:
+            existing = self.existing_ids([doc['metadata']['chunk_hash'] for doc in documents])
+            rows = []
+            vectors = []
+            for doc, embedding in zip(documents, embeddings):
+                chunk_hash = doc['metadata']['chunk_hash']
+                if chunk_hash in existing:
+                    continue
+                existing.add(chunk_hash)
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (chunk_hash, text, metadata) VALUES (?, ?, ?)",
+                    (chunk_hash, doc['text'], json.dumps(doc['metadata']))
+                )
+                rows.append(cursor.lastrowid)
+                vectors.append(embedding)
+            if not rows:
+                return
+            
+            matrix = np.asarray(vectors, dtype="float32")
+            row_ids = np.asarray(rows, dtype="int64")
+            self._writable_index(matrix).add_with_ids(matrix, row_ids)
+            self._train_ivf()
+            if self.quantization != "none":
+                self.vectors.write(row_ids, matrix)
+            self._unsaved += len(rows)
+            if self._unsaved >= self.save_every:
+                self.save()
+
+    def delete(self, ids: List[str]):
+        """Remove documents by chunk hash.
+
+        HNSW indexes cannot drop vectors; their rows are removed from the
+        side store, which hides them from search results, and searches
+        over-fetch by the number of such vectors. The graph is rebuilt
+        once they pass HNSW_REBUILD_RATIO of it.
+        """
+        with self._lock:
+            row_ids = []
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                row_ids.extend(
+                    row[0] for row in self._conn.execute(
+                        f"SELECT row_id FROM chunks WHERE chunk_hash IN ({placeholders})", batch
+                    )
+                )
+            if not row_ids:
+                return
+            if self.index is not None and self.index_type != "hnsw":
+                self._writable_index(None).remove_ids(np.asarray(row_ids, dtype="int64"))
+            self._conn.executemany("DELETE FROM chunks WHERE row_id = ?", [(row_id,) for row_id in row_ids])
+            if self.index is not None and self.index_type == "hnsw":
+                self._deleted += len(row_ids)
+                if self._deleted > self.index.ntotal * HNSW_REBUILD_RATIO:
+                    self._rebuild_hnsw()
+            self._unsaved += len(row_ids)
+            if self._unsaved >= self.save_every:
+                self.save()
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Return the subset of ids already stored"""
+        found = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    row[0] for row in self._conn.execute(
+                        f"SELECT chunk_hash FROM chunks WHERE chunk_hash IN ({placeholders})", batch
+                    )
+                )
+        return found
+
+    def similarity_search(self, query_embedding: List[float], top_k: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """Search for similar documents, optionally restricted by a metadata filter.
+
+        Filters support equality on metadata fields and ``{"$in": [...]}``;
+        they are applied to an over-fetched candidate list.
+        """
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            query = np.asarray([query_embedding], dtype="float32")
+            fetch = top_k if where is None else top_k * 10
+            if self.quantization != "none":
+                fetch *= self.rerank_factor
+            # Deleted HNSW rows can take up to this many of the nearest slots
+            fetch += self._deleted
+            distances, row_ids = self.index.search(query, min(self.index.ntotal, fetch))
+            distances, row_ids = distances[0], row_ids[0]
+            keep = row_ids != -1
+            distances, row_ids = distances[keep], row_ids[keep]
+            if self.quantization != "none" and len(row_ids):
+                distances, row_ids = self.vectors.rerank(query[0], row_ids)
+            documents = self._rows([int(row_id) for row_id in row_ids])
+        
+        results = []
+        for distance, row_id in zip(distances, row_ids):
+            doc = documents.get(int(row_id))
+            if doc is None or (where and not _matches(doc['metadata'], where)):
+                continue
+            results.append({**doc, 'distance': float(distance)})
+            if len(results) == top_k:
+                break
+        return results
+
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield every stored document with its metadata, one page at a time"""
+        last_row = 0
+        while True:
+            with self._lock:
+                page = self._conn.execute(
+                    "SELECT row_id, chunk_hash, text, metadata FROM chunks WHERE row_id > ? ORDER BY row_id LIMIT ?",
+                    (last_row, batch_size)
+                ).fetchall()
+            if not page:
+                return
+            for row_id, chunk_hash, text, metadata in page:
+                yield {'id': chunk_hash, 'text': text, 'metadata': json.loads(metadata)}
+            last_row = page[-1][0]
+
+    def save(self):
+        """Write the index to disk and commit the matching metadata rows"""
+        with self._lock:
+            index_path = self._index_path()
+            if index_path and self.index is not None and not self._read_only:
+                temporary = index_path + ".tmp"
+                faiss.write_index(self.index, temporary)
+                os.replace(temporary, index_path)
+            self._conn.commit()
+            self._unsaved = 0
+
+    def persist(self):
+        self.save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _rows(self, row_ids: List[int]) -> Dict[int, Dict]:
+        if not row_ids:
+            return {}
+        placeholders = ",".join("?" * len(row_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT row_id, chunk_hash, text, metadata FROM chunks WHERE row_id IN ({placeholders})",
+                row_ids
+            ).fetchall()
+        return {
+            row_id: {'id': chunk_hash, 'text': text, 'metadata': json.loads(metadata)}
+            for row_id, chunk_hash, text, metadata in rows
+        }
+
+    def _check_layout(self, layout: Dict[str, str]):
+        """Record the index layout on first use; refuse to reopen a store with a different one"""
+        stored = dict(self._conn.execute("SELECT name, value FROM layout"))
+        for name, value in layout.items():
+            if name not in stored:
+                self._conn.execute("INSERT INTO layout (name, value) VALUES (?, ?)", (name, value))
+            elif stored[name] != value:
+                raise ValueError(
+                    f"FAISS store at {self.persist_directory} was built with {name}={stored[name]}, "
+                    f"not {value}; rebuild it or change the setting back"
+                )
+
+    def _index_path(self) -> Optional[str]:
+        if not self.persist_directory:
+            return None
+        return os.path.join(self.persist_directory, INDEX_FILE)
+
+    def _writable_index(self, sample: Optional[np.ndarray]) -> faiss.Index:
+        """Return an index that accepts additions, building or reloading it if needed"""
+        if self.index is None:
+            self.index = self._build_index(sample)
+        elif self._read_only:
+            self.index = faiss.read_index(self._index_path())
+            self._configure(self.index)
+            self._read_only = False
+        return self.index
+
+    def _build_index(self, sample: np.ndarray) -> faiss.Index:
+        """Create an index sized for the first batch of vectors"""
+        dimension = sample.shape[1]
+        if self.index_type == "ivf":
+            # Exact until there are enough vectors to train on; see _train_ivf
+            return faiss.IndexIDMap2(faiss.index_factory(dimension, "Flat"))
+        encoding = self._encoding(dimension, len(sample))
+        if self.index_type == "hnsw":
+            description = f"HNSW{self.hnsw_m}" if encoding == "Flat" else f"HNSW{self.hnsw_m}_{encoding}"
+            index = faiss.IndexIDMap2(faiss.index_factory(dimension, description))
+        else:
+            index = faiss.IndexIDMap2(faiss.index_factory(dimension, encoding))
+        if not index.is_trained:
+            index.train(sample)
+        self._configure(index)
+        return index
+
+    def _train_ivf(self):
+        """Replace an ivf store's exact staging index once it holds nlist * 39 vectors"""
+        if self.index_type != "ivf" or faiss.try_extract_index_ivf(self.index) is not None:
+            return
+        if self.index.ntotal < self.nlist * IVF_POINTS_PER_LIST:
+            return
+        row_ids = faiss.vector_to_array(self.index.id_map).astype("int64")
+        matrix = faiss.downcast_index(self.index.index).reconstruct_n(0, self.index.ntotal)
+        dimension = matrix.shape[1]
+        index = faiss.index_factory(dimension, f"IVF{self.nlist},{self._encoding(dimension, len(matrix))}")
+        index.train(matrix)
+        index.add_with_ids(matrix, row_ids)
+        self._configure(index)
+        self.index = index
+
+    def _rebuild_hnsw(self):
+        """Re-add only the live vectors to an emptied HNSW graph, keeping its trained encoding"""
+        index = self._writable_index(None)
+        row_ids = faiss.vector_to_array(index.id_map).astype("int64")
+        live = np.isin(row_ids, self._live_rows())
+        if self.quantization == "none":
+            matrix = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)[live]
+        else:
+            # Codes decode lossily; re-encode the full-precision vectors instead
+            matrix = self.vectors._read(row_ids[live]) if live.any() else None
+        index.reset()
+        if live.any():
+            index.add_with_ids(matrix, row_ids[live])
+        self._deleted = 0
+
+    def _live_rows(self) -> np.ndarray:
+        return np.fromiter((row[0] for row in self._conn.execute("SELECT row_id FROM chunks")), dtype="int64")
+
+    def _encoding(self, dimension: int, sample_size: int) -> str:
+        """FAISS factory code for the configured vector encoding"""
+        if self.quantization == "fp16":
+            return "SQfp16"
+        if self.quantization == "sq8":
+            return "SQ8"
+        if self.quantization == "pq":
+            # Sub-quantizer count must divide the dimension
+            m = max(d for d in range(1, min(self.pq_m, dimension) + 1) if dimension % d == 0)
+            if self.index_type == "hnsw":
+                if sample_size < 256:
+                    raise ValueError("HNSW with PQ needs at least 256 vectors in the first batch to train")
+                return f"PQ{m}"
+            # Fewer centroids per sub-quantizer when the first batch is small
+            nbits = max(1, min(8, int(math.log2(sample_size))))
+            return f"PQ{m}x{nbits}"
+        return "Flat"
+
+    def _configure(self, index: faiss.Index):
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        if hasattr(inner, "hnsw"):
+            inner.hnsw.efSearch = self.hnsw_ef_search
+
+class FullPrecisionVectors:
+    """Float32 vectors stored by row id in a flat file, read back through a memory map.
+
+    Only needed when the index holds compressed codes. Without a path the
+    vectors are kept in memory.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.dimension: Optional[int] = None
+        self._memory: Dict[int, np.ndarray] = {}
+        self._mapped: Optional[np.memmap] = None
+
+    def write(self, row_ids: np.ndarray, matrix: np.ndarray):
+        self.dimension = matrix.shape[1]
+        if self.path is None:
+            for row_id, vector in zip(row_ids, matrix):
+                self._memory[int(row_id)] = vector
+            return
+        row_bytes = self.dimension * 4
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as vectors_file:
+            for row_id, vector in zip(row_ids, matrix):
+                vectors_file.seek(int(row_id) * row_bytes)
+                vectors_file.write(vector.tobytes())
+        self._mapped = None
+
+    def rerank(self, query: np.ndarray, row_ids: np.ndarray):
+        """Exact squared L2 distances for candidate rows, closest first"""
+        candidates = self._read(row_ids)
+        distances = ((candidates - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)
+        return distances[order], row_ids[order]
+
+    def _read(self, row_ids: np.ndarray) -> np.ndarray:
+        if self.path is None:
+            return np.stack([self._memory[int(row_id)] for row_id in row_ids])
+        if self._mapped is None:
+            if self.dimension is None:
+                raise RuntimeError("Vector dimension unknown; add documents before searching")
+            self._mapped = np.memmap(self.path, dtype="float32", mode="r").reshape(-1, self.dimension)
+        return np.asarray(self._mapped[row_ids])
+
+def _matches(metadata: Dict, where: Dict) -> bool:
+    for field, condition in where.items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
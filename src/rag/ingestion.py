@@ -0,0 +1,134 @@
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+import time
+from ..config import get_settings
+from .document_proccesor import DocumentProcessor
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class Embedder:
+    """Sentence-transformers embedding model, loaded on first use"""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class IngestionPipeline:
+    """Embeds document chunks in fixed-size batches and writes them to a store.
+
+    Chunks whose ``chunk_hash`` is already stored (or was already seen in
+    this run) are skipped before any embedding work. Writes go to the store
+    in batches of at most ``upsert_batch_size`` chunks. The store can be a
+    VectorStore or a Retriever.
+    """
+
+    def __init__(
+        self,
+        store,
+        embedder: Embedder,
+        embed_batch_size: int = 64,
+        upsert_batch_size: int = 512,
+        processor: Optional[DocumentProcessor] = None
+    ):
+        self.store = store
+        self.embedder = embedder
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.processor = processor or DocumentProcessor()
+
+    def ingest_pdf(self, file_path: str) -> Dict:
+        """Ingest one PDF, embedding early pages while later ones are still being read"""
+        return self.ingest(self.processor.iter_pdf_chunks(file_path))
+
+    def ingest(self, chunks: Iterable[Dict]) -> Dict:
+        """Embed and store new chunks, returning counts and throughput"""
+        started = time.perf_counter()
+        seen = set()
+        pending_docs: List[Dict] = []
+        pending_embeddings: List[List[float]] = []
+        total = skipped = embedded = 0
+        
+        for batch in batched(chunks, self.embed_batch_size):
+            total += len(batch)
+            fresh = {}
+            for chunk in batch:
+                chunk_hash = chunk['metadata']['chunk_hash']
+                if chunk_hash not in seen:
+                    seen.add(chunk_hash)
+                    fresh[chunk_hash] = chunk
+            existing = self.store.existing_ids(list(fresh))
+            new_chunks = [chunk for chunk_hash, chunk in fresh.items() if chunk_hash not in existing]
+            skipped += len(batch) - len(new_chunks)
+            if not new_chunks:
+                continue
+            
+            pending_docs.extend(new_chunks)
+            pending_embeddings.extend(self.embedder.embed_documents([chunk['text'] for chunk in new_chunks]))
+            embedded += len(new_chunks)
+            while len(pending_docs) >= self.upsert_batch_size:
+                self.store.add_documents(
+                    pending_docs[:self.upsert_batch_size],
+                    pending_embeddings[:self.upsert_batch_size]
+                )
+                del pending_docs[:self.upsert_batch_size]
+                del pending_embeddings[:self.upsert_batch_size]
+        
+        if pending_docs:
+            self.store.add_documents(pending_docs, pending_embeddings)
+        persist = getattr(self.store, "persist", None)
+        if persist is not None:
+            persist()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "chunks": total,
+            "skipped": skipped,
+            "embedded": embedded,
+            "seconds": elapsed,
+            "chunks_per_second": total / elapsed if elapsed else 0.0
+        }
+
+def create_embedder() -> Embedder:
+    settings = get_settings()
+    return Embedder(settings.EMBEDDING_MODEL, settings.EMBEDDING_BATCH_SIZE)
+
+@lru_cache()
+def get_embedder() -> Embedder:
+    """Process-wide embedder, so the model is loaded once"""
+    return create_embedder()
+
+def create_pipeline(store, embedder: Optional[Embedder] = None) -> IngestionPipeline:
+    """Build an IngestionPipeline with batch sizes from settings"""
+    settings = get_settings()
+    return IngestionPipeline(
+        store,
+        embedder or get_embedder(),
+        embed_batch_size=settings.EMBEDDING_BATCH_SIZE,
+        upsert_batch_size=settings.INGEST_UPSERT_BATCH_SIZE
+    )
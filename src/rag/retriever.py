@@ -0,0 +1,189 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import math
+import re
+import threading
+from ..config import get_settings
+
+# Keeps identifiers such as "gpt-4", "resnet50" or "cifar-10" as single terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """Incrementally updated in-memory inverted index scored with Okapi BM25"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Dict] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def add(self, doc_id: str, text: str, metadata: Dict):
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if doc_id in self.documents:
+                self._remove(doc_id)
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            self.documents[doc_id] = {'text': text, 'metadata': metadata}
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if doc_id in self.documents:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        for term in set(tokenize(self.documents[doc_id]['text'])):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.documents[doc_id]
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return (doc_id, score) pairs for the best lexical matches"""
+        with self._lock:
+            count = len(self.doc_lengths)
+            if not count:
+                return []
+            average_length = self.total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+class Retriever:
+    """Hybrid retriever fusing BM25 and vector search with reciprocal rank fusion.
+
+    Both stages run concurrently by default. With ``prefilter`` enabled the
+    lexical candidates are retrieved first and restrict the vector search.
+    ``vector_store`` may be any backend created by create_vector_store.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        embed_query: Callable[[str], List[float]],
+        lexical_k: int = 20,
+        vector_k: int = 20,
+        rrf_k: int = 60,
+        prefilter: bool = False
+    ):
+        self.vector_store = vector_store
+        self.embed_query = embed_query
+        self.lexical_k = lexical_k
+        self.vector_k = vector_k
+        self.rrf_k = rrf_k
+        self.prefilter = prefilter
+        self.index = BM25Index()
+
+    def add_documents(self, documents: List[Dict], embeddings: List[List[float]]):
+        """Add documents to the vector store and the lexical index"""
+        self.vector_store.add_documents(documents, embeddings)
+        for doc in documents:
+            self.index.add(doc['metadata']['chunk_hash'], doc['text'], doc['metadata'])
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        return self.vector_store.existing_ids(ids)
+
+    def delete(self, ids: List[str]):
+        """Remove documents from the vector store and the lexical index"""
+        self.vector_store.delete(ids)
+        for doc_id in ids:
+            self.index.remove(doc_id)
+
+    def persist(self):
+        persist = getattr(self.vector_store, "persist", None)
+        if persist is not None:
+            persist()
+
+    def index_existing(self, batch_size: int = 1000):
+        """Build the lexical index from documents already in the vector store"""
+        for doc in self.vector_store.iter_documents(batch_size):
+            self.index.add(doc['id'], doc['text'], doc['metadata'])
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Blocking hybrid search"""
+        lexical = self.index.search(query, self.lexical_k)
+        vector = self._vector_search(query, self._candidate_filter(lexical))
+        return self._fuse(lexical, vector, top_k)
+
+    async def aretrieve(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Hybrid search with both stages off the event loop"""
+        loop = asyncio.get_running_loop()
+        if self.prefilter:
+            lexical = await loop.run_in_executor(None, self.index.search, query, self.lexical_k)
+            vector = await loop.run_in_executor(None, self._vector_search, query, self._candidate_filter(lexical))
+        else:
+            lexical, vector = await asyncio.gather(
+                loop.run_in_executor(None, self.index.search, query, self.lexical_k),
+                loop.run_in_executor(None, self._vector_search, query, None)
+            )
+        return self._fuse(lexical, vector, top_k)
+
+    def _candidate_filter(self, lexical: List[Tuple[str, float]]) -> Optional[Dict]:
+        if not self.prefilter or not lexical:
+            return None
+        return {"chunk_hash": {"$in": [doc_id for doc_id, _ in lexical]}}
+
+    def _vector_search(self, query: str, where: Optional[Dict]) -> List[Dict]:
+        return self.vector_store.similarity_search(self.embed_query(query), self.vector_k, where=where)
+
+    def _fuse(self, lexical: List[Tuple[str, float]], vector: List[Dict], top_k: int) -> List[Dict]:
+        """Combine both rankings with reciprocal rank fusion"""
+        fused: Dict[str, Dict] = {}
+        for rank, (doc_id, _) in enumerate(lexical, 1):
+            doc = self.index.documents.get(doc_id)
+            if doc is None:
+                continue
+            entry = fused.setdefault(doc_id, {**doc, 'score': 0.0})
+            entry['score'] += 1.0 / (self.rrf_k + rank)
+            entry['lexical_rank'] = rank
+        for rank, doc in enumerate(vector, 1):
+            entry = fused.setdefault(doc['id'], {'text': doc['text'], 'metadata': doc['metadata'], 'score': 0.0})
+            entry['score'] += 1.0 / (self.rrf_k + rank)
+            entry['vector_rank'] = rank
+        return heapq.nlargest(top_k, fused.values(), key=lambda entry: entry['score'])
+
+def create_retriever(vector_store, embed_query: Callable[[str], List[float]], prefilter: bool = False) -> Retriever:
+    """Build a Retriever with per-stage top-k from settings"""
+    settings = get_settings()
+    return Retriever(
+        vector_store,
+        embed_query,
+        lexical_k=settings.RETRIEVER_LEXICAL_K,
+        vector_k=settings.RETRIEVER_VECTOR_K,
+        rrf_k=settings.RETRIEVER_RRF_K,
+        prefilter=prefilter
+    )
+
+@lru_cache()
+def get_retriever() -> Retriever:
+    """Process-wide retriever over the shared vector store, with its lexical index rebuilt from it"""
+    from .backends import get_vector_store
+    from .ingestion import get_embedder
+    retriever = create_retriever(get_vector_store(), get_embedder().embed_query)
+    retriever.index_existing()
+    return retriever
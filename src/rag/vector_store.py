@@ -1,6 +1,6 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Set
 import numpy as np
 
 class VectorStore:
@@ -24,14 +24,48 @@ class VectorStore:
             metadatas=metadatas
         )
     
-    def similarity_search(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
-        """Search for similar documents"""
+    def delete(self, ids: List[str]):
+        """Remove documents by chunk hash"""
+        if ids:
+            self.collection.delete(ids=ids)
+    
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Return the subset of ids already stored"""
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=ids, include=[])['ids'])
+    
+    def similarity_search(self, query_embedding: List[float], top_k: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """Search for similar documents, optionally restricted by a metadata filter"""
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=top_k
+            n_results=top_k,
+            where=where
         )
         
         return [{
+            'id': doc_id,
             'text': doc,
-            'metadata': metadata
-        } for doc, metadata in zip(results['documents'][0], results['metadatas'][0])]
\ No newline at end of file
+            'metadata': metadata,
+            'distance': distance
+        } for doc_id, doc, metadata, distance in zip(
+            results['ids'][0],
+            results['documents'][0],
+            results['metadatas'][0],
+            results['distances'][0]
+        )]
+    
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield every stored document with its metadata, one page at a time"""
+        offset = 0
+        while True:
+            page = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+            if not page['ids']:
+                return
+            for doc_id, doc, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                yield {'id': doc_id, 'text': doc, 'metadata': metadata}
+            offset += len(page['ids'])
\ No newline at end of file
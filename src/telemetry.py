@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import itertools
+import threading
+import time
+import uuid
+from .config import get_settings
+
+# Seconds; spans range from sub-millisecond cache lookups to multi-minute generations
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+PROMPT_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+_span_ids = itertools.count(1)
+
+def _labels(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set_total(self, value: float, **labels):
+        """Publish a running total kept elsewhere; it must never decrease"""
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(labels)} {value}" for labels, value in values)
+        return lines
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in values:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+SPAN_SECONDS = Histogram("research_assistant_span_seconds", "Time spent in each instrumented stage", SPAN_BUCKETS)
+SPAN_ERRORS = Counter("research_assistant_span_errors_total", "Instrumented stages that raised")
+LLM_TOKENS = Counter("research_assistant_llm_tokens_total", "Tokens processed by Ollama, by kind (prompt or completion)")
+PROMPT_CHARS = Histogram("research_assistant_llm_prompt_chars", "Size of prompts sent to the LLM gateway", PROMPT_BUCKETS)
+CACHE_LOOKUPS = Counter("research_assistant_cache_lookups_total", "Cache lookups by cache and result (memory, disk or miss)")
+LLM_QUEUE = Gauge("research_assistant_llm_gateway", "LLM gateway state (active, queued)")
+LLM_REJECTED = Counter("research_assistant_llm_gateway_rejected_total", "LLM requests refused because the gateway queue was full")
+JOBS = Gauge("research_assistant_jobs", "Research jobs by state (queued, running, retained)")
+
+METRICS = [SPAN_SECONDS, SPAN_ERRORS, LLM_TOKENS, PROMPT_CHARS, CACHE_LOOKUPS, LLM_QUEUE, LLM_REJECTED, JOBS]
+
+class Span:
+    __slots__ = ("id", "name", "parent_id", "started", "duration", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.id = next(_span_ids)
+        self.name = name
+        self.parent_id = parent_id
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def as_dict(self) -> Dict:
+        return {
+            "trace_id": self.id,
+            "started_at": self.started_at,
+            "spans": [
+                {
+                    "id": span.id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ms": round((span.started - self._started) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3) if span.duration is not None else None,
+                    "attributes": span.attributes
+                }
+                for span in list(self.spans)
+            ]
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class TraceBuffer:
+    """The most recent traces, looked up by id"""
+
+    def __init__(self, max_traces: int):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.id] = trace
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+@lru_cache()
+def get_trace_buffer() -> TraceBuffer:
+    """Process-wide buffer of recent request traces"""
+    return TraceBuffer(get_settings().TRACE_BUFFER_SIZE)
+
+def start_trace() -> Trace:
+    """Start recording spans for the current context and its child tasks"""
+    trace = Trace()
+    _current_trace.set(trace)
+    get_trace_buffer().add(trace)
+    return trace
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time a block as a named stage, nested under the enclosing span.
+
+    Do not hold a span across a ``yield`` in an async generator: the
+    consumer may resume it in another context. Use ``record`` there.
+    """
+    parent = _current_span.get()
+    current = Span(name, parent.id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current, time.perf_counter() - current.started)
+
+def detach():
+    """Stop the current context recording into the trace and span it inherited.
+
+    For long-lived tasks started from a request, such as worker loops.
+    """
+    _current_trace.set(None)
+    _current_span.set(None)
+
+def record(name: str, seconds: float, **attributes):
+    """Record an already-timed stage under the current span"""
+    parent = _current_span.get()
+    finished = Span(name, parent.id if parent else None, attributes)
+    finished.started -= seconds
+    _finish(finished, seconds)
+
+def annotate(**attributes):
+    """Attach attributes to the innermost open span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+def in_context(fn: Callable) -> Callable:
+    """Bind fn to a copy of the current context, for run_in_executor and threads"""
+    return partial(copy_context().run, fn)
+
+def count_tokens(prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, kind="completion")
+    annotate(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+def observe_cache(cache: str, stats: Dict[str, Any]):
+    """Publish the lookup totals of a TieredCache.stats() snapshot; hit rates are left to PromQL"""
+    CACHE_LOOKUPS.set_total(stats["memory_hits"], cache=cache, result="memory")
+    CACHE_LOOKUPS.set_total(stats["disk_hits"], cache=cache, result="disk")
+    CACHE_LOOKUPS.set_total(stats["misses"], cache=cache, result="miss")
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+def _finish(finished: Span, seconds: float):
+    finished.duration = seconds
+    SPAN_SECONDS.observe(seconds, span=finished.name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(finished)
\ No newline at end of file
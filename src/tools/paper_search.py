@@ -1,11 +1,29 @@
 import arxiv
 from scholarly import scholarly
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import os
 import requests
 from bs4 import BeautifulSoup
 from langchain.tools import BaseTool
-from pydantic import Field
+from langchain.pydantic_v1 import Field
 import json
+from functools import lru_cache
+from .. import telemetry
+from ..cache import DiskCache, LRUCache, TieredCache
+from ..config import get_settings
+
+@lru_cache()
+def get_search_cache() -> TieredCache:
+    """Process-wide search result cache (memory LRU + SQLite under VECTOR_DB_PATH)"""
+    settings = get_settings()
+    return TieredCache(
+        LRUCache(settings.SEARCH_CACHE_MEMORY_ENTRIES),
+        DiskCache(
+            os.path.join(settings.VECTOR_DB_PATH, "search_cache.sqlite"),
+            max_bytes=settings.SEARCH_CACHE_MAX_BYTES
+        )
+    )
 
 class PaperSearchTool(BaseTool):
     name = "paper_search"
@@ -16,41 +34,12 @@ class PaperSearchTool(BaseTool):
     def _run(self, query: str) -> str:
         """Search for papers using the query."""
         try:
-            # Search arXiv
-            arxiv_search = arxiv.Search(
-                query=query,
-                max_results=self.max_results,
-                sort_by=arxiv.SortCriterion.Relevance
-            )
-            
-            arxiv_results = []
-            for result in arxiv_search.results():
-                arxiv_results.append({
-                    "title": result.title,
-                    "authors": [author.name for author in result.authors],
-                    "summary": result.summary,
-                    "pdf_url": result.pdf_url,
-                    "published": str(result.published),
-                    "source": "arXiv"
-                })
-            
-            # Search Google Scholar
-            scholar_results = []
-            search_query = scholarly.search_pubs(query)
-            for i, result in enumerate(search_query):
-                if i >= self.max_results:
-                    break
-                scholar_results.append({
-                    "title": result.bib.get('title', ''),
-                    "authors": result.bib.get('author', []),
-                    "abstract": result.bib.get('abstract', ''),
-                    "url": result.bib.get('url', ''),
-                    "year": result.bib.get('year', ''),
-                    "source": "Google Scholar"
-                })
-            
             # Combine results
-            self.sources = arxiv_results + scholar_results
+            self.sources = [
+                result
+                for source, (search, _, ttl) in self._backends().items()
+                for result in self._cached_search(source, search, ttl, query)
+            ]
             
             return json.dumps({
                 "status": "success",
@@ -63,10 +52,150 @@ class PaperSearchTool(BaseTool):
                 "message": str(e)
             }, indent=2)
 
-    def _arun(self, query: str) -> str:
-        """Async version of _run."""
-        return self._run(query)
+    async def _arun(self, query: str) -> str:
+        """Async version of _run, querying all backends concurrently."""
+        results, errors = await self.asearch(query)
+        if errors and not results:
+            return json.dumps({
+                "status": "error",
+                "message": "; ".join(f"{source}: {error}" for source, error in errors.items())
+            }, indent=2)
+        
+        response = {
+            "status": "success",
+            "results": results
+        }
+        if errors:
+            response["errors"] = errors
+        return json.dumps(response, indent=2)
+
+    async def asearch(self, query: str) -> Tuple[List[Dict], Dict[str, str]]:
+        """Query every backend concurrently and return (results, errors).
+
+        Backends that fail or exceed their timeout are reported in ``errors``;
+        whatever finished in time is still returned.
+        """
+        results: Dict[str, List[Dict]] = {}
+        errors: Dict[str, str] = {}
+        async for source, source_results, error in self.astream(query):
+            if error:
+                errors[source] = error
+            else:
+                results[source] = source_results
+        
+        # Keep the arXiv-then-Scholar ordering of the synchronous path
+        self.sources = [
+            result
+            for source in self._backends()
+            for result in results.get(source, [])
+        ]
+        return self.sources, errors
+
+    async def astream(self, query: str) -> AsyncIterator[Tuple[str, List[Dict], Optional[str]]]:
+        """Yield (source, results, error) for each backend as soon as it finishes."""
+        loop = asyncio.get_running_loop()
+        pending = {
+            asyncio.ensure_future(self._search_backend(loop, source, search, timeout, ttl, query))
+            for source, (search, timeout, ttl) in self._backends().items()
+        }
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _search_backend(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        source: str,
+        search: Callable[[str], List[Dict]],
+        timeout: float,
+        ttl: float,
+        query: str
+    ) -> Tuple[str, List[Dict], Optional[str]]:
+        """Run a blocking backend search in the default executor with a timeout"""
+        with telemetry.span("search." + source.lower().replace(" ", "_")) as current:
+            try:
+                results = await asyncio.wait_for(
+                    loop.run_in_executor(None, telemetry.in_context(self._cached_search), source, search, ttl, query),
+                    timeout
+                )
+                current.set(results=len(results))
+                return source, results, None
+            except asyncio.TimeoutError:
+                current.set(error="timeout")
+                return source, [], f"timed out after {timeout}s"
+            except Exception as e:
+                current.set(error=type(e).__name__)
+                return source, [], str(e)
+
+    def _backends(self) -> Dict[str, Tuple[Callable[[str], List[Dict]], float, float]]:
+        """Map each source name to its search function, timeout and cache TTL"""
+        settings = get_settings()
+        return {
+            "arXiv": (self._search_arxiv, settings.ARXIV_TIMEOUT, settings.SEARCH_CACHE_TTL_ARXIV),
+            "Google Scholar": (self._search_scholar, settings.SCHOLAR_TIMEOUT, settings.SEARCH_CACHE_TTL_SCHOLAR)
+        }
+
+    def _cached_search(
+        self,
+        source: str,
+        search: Callable[[str], List[Dict]],
+        ttl: float,
+        query: str
+    ) -> List[Dict]:
+        """Serve a backend search from the cache, populating it on a miss"""
+        if not get_settings().SEARCH_CACHE_ENABLED:
+            return search(query)
+        
+        normalized = " ".join(query.lower().split())
+        key = f"{source}|{self.max_results}|{normalized}"
+        cache = get_search_cache()
+        results = cache.get(key)
+        telemetry.annotate(cached=results is not None)
+        if results is None:
+            results = search(query)
+            cache.set(key, results, ttl)
+        return results
+
+    def _search_arxiv(self, query: str) -> List[Dict]:
+        """Search arXiv (blocking)"""
+        arxiv_search = arxiv.Search(
+            query=query,
+            max_results=self.max_results,
+            sort_by=arxiv.SortCriterion.Relevance
+        )
+        
+        arxiv_results = []
+        for result in arxiv_search.results():
+            arxiv_results.append({
+                "title": result.title,
+                "authors": [author.name for author in result.authors],
+                "summary": result.summary,
+                "pdf_url": result.pdf_url,
+                "published": str(result.published),
+                "source": "arXiv"
+            })
+        return arxiv_results
+
+    def _search_scholar(self, query: str) -> List[Dict]:
+        """Search Google Scholar (blocking)"""
+        scholar_results = []
+        search_query = scholarly.search_pubs(query)
+        for i, result in enumerate(search_query):
+            if i >= self.max_results:
+                break
+            scholar_results.append({
+                "title": result.bib.get('title', ''),
+                "authors": result.bib.get('author', []),
+                "abstract": result.bib.get('abstract', ''),
+                "url": result.bib.get('url', ''),
+                "year": result.bib.get('year', ''),
+                "source": "Google Scholar"
+            })
+        return scholar_results
 
     def get_sources(self) -> List[Dict]:
         """Get the list of sources found in the last search."""
-        return self.sources
\ No newline at end of file
+        return self.sources
@@ -0,0 +1,127 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+import asyncio
+import hashlib
+import io
+import mmap
+import os
+from PyPDF2 import PdfReader
+from ..config import get_settings
+
+class PDFFile(NamedTuple):
+    """A PDF on disk that the server itself wrote, such as a spooled upload.
+
+    Paths are wrapped rather than passed as strings so that text coming from
+    a client or the agent can never be mistaken for a local file.
+    """
+    path: str
+
+# Raw PDF bytes, or a server-owned PDF file on disk
+PDFSource = Union[bytes, PDFFile]
+
+def _check_source(source: PDFSource):
+    if not isinstance(source, (bytes, bytearray, PDFFile)):
+        raise TypeError(f"Expected PDF bytes or a PDFFile, got {type(source).__name__}")
+
+@contextmanager
+def open_pdf(source: PDFSource) -> Iterator[BinaryIO]:
+    """Open a PDF source as a seekable stream; files are memory-mapped, not read"""
+    _check_source(source)
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+    with open(source.path, "rb") as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+def fingerprint(source: PDFSource, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a PDF's bytes, reading files in chunks"""
+    _check_source(source)
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+        return digest.hexdigest()
+    with open(source.path, "rb") as pdf_file:
+        for chunk in iter(lambda: pdf_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def count_pages(source: PDFSource) -> int:
+    """Number of pages in a PDF"""
+    with open_pdf(source) as stream:
+        return len(PdfReader(stream).pages)
+
+def extract_page_range(source: PDFSource, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end); runs inside a pool worker"""
+    with open_pdf(source) as stream:
+        reader = PdfReader(stream)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+class PDFExtractionPool:
+    """Extracts PDF text in worker processes, off the event loop and the GIL.
+
+    Documents larger than ``pages_per_task`` pages are split into page
+    ranges that are extracted in parallel and merged back in page order.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, pages_per_task: int = 25, timeout: float = 120.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        return [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+
+    async def extract_text(self, source: PDFSource) -> str:
+        """Extract the full text of a PDF without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(self.executor, count_pages, source)
+        futures = [
+            loop.run_in_executor(self.executor, extract_page_range, source, start, end)
+            for start, end in self.page_ranges(page_count)
+        ]
+        try:
+            parts = await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"PDF extraction timed out after {self.timeout}s")
+        return "".join(text for part in parts for text in part)
+
+    def extract_text_sync(self, source: PDFSource) -> str:
+        """Blocking variant of extract_text"""
+        page_count = self.executor.submit(count_pages, source).result(self.timeout)
+        futures = [
+            self.executor.submit(extract_page_range, source, start, end)
+            for start, end in self.page_ranges(page_count)
+        ]
+        _, not_done = wait(futures, timeout=self.timeout)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise TimeoutError(f"PDF extraction timed out after {self.timeout}s")
+        return "".join(text for future in futures for text in future.result())
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+@lru_cache()
+def get_pdf_pool() -> PDFExtractionPool:
+    """Process-wide PDF extraction pool configured from settings"""
+    settings = get_settings()
+    return PDFExtractionPool(
+        max_workers=settings.PDF_WORKERS,
+        pages_per_task=settings.PDF_PAGES_PER_TASK,
+        timeout=settings.PDF_PARSE_TIMEOUT
+    )
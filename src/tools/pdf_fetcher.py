@@ -0,0 +1,332 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+import asyncio
+import io
+import ipaddress
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .. import telemetry
+from ..cache import FileCache
+from ..config import get_settings
+from .pdf_extraction import PDFFile
+
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{}"
+
+# New-style ids (2101.00001v2) and old-style ids (hep-th/9901001)
+ARXIV_ID = re.compile(r'^(?:\d{4}\.\d{4,5}|[a-z][a-z.-]*/\d{7})(?:v\d+)?$', re.IGNORECASE)
+
+# Rate limiting and transient server errors; anything else fails immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Called with every URL a fetch will request, including redirect targets; raises to refuse it
+URLGuard = Callable[[str], None]
+
+class PDFFetchError(Exception):
+    """Raised when a PDF cannot be downloaded"""
+
+class PDFURLNotAllowedError(PDFFetchError):
+    """Raised when a URL is outside the hosts a caller may fetch from"""
+
+def arxiv_pdf_url(arxiv_id: str) -> str:
+    """PDF URL for an arXiv id, accepting an optional 'arXiv:' prefix"""
+    arxiv_id = arxiv_id.strip()
+    if arxiv_id.lower().startswith("arxiv:"):
+        arxiv_id = arxiv_id[len("arxiv:"):]
+    if not ARXIV_ID.match(arxiv_id):
+        raise ValueError(f"Not an arXiv id: {arxiv_id}")
+    return ARXIV_PDF_URL.format(arxiv_id)
+
+def check_public_url(url: str, allowed_hosts: Iterable[str]):
+    """Refuse URLs that are not http(s) on an allowed host (or its subdomains) with only public addresses"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise PDFURLNotAllowedError(f"Not an http(s) URL: {url}")
+    if not any(host == allowed or host.endswith("." + allowed) for allowed in allowed_hosts):
+        raise PDFURLNotAllowedError(f"{host} is not an allowed PDF host")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)}
+    except socket.gaierror as e:
+        raise PDFFetchError(f"{host}: {e}") from e
+    for address in addresses:
+        if not _is_public(address):
+            raise PDFURLNotAllowedError(f"{host} resolves to the non-public address {address}")
+
+def _is_public(address: str) -> bool:
+    # Private, loopback, link-local and reserved ranges are not global
+    return ipaddress.ip_address(address.split("%")[0]).is_global
+
+class _PublicPeerMixin:
+    """Refuses a new connection whose socket is not connected to a public address.
+
+    check_public_url resolves the host once and the connection resolves it
+    again, so a rebinding DNS server could answer differently the second
+    time. Checking the peer of the socket actually opened closes that gap.
+    """
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        address = sock.getpeername()[0]
+        if not _is_public(address):
+            sock.close()
+            raise PDFURLNotAllowedError(f"{self.host} connected to the non-public address {address}")
+        return sock
+
+class _PublicHTTPConnection(_PublicPeerMixin, HTTPConnection):
+    pass
+
+class _PublicHTTPSConnection(_PublicPeerMixin, HTTPSConnection):
+    pass
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+class PublicAddressAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections only reach public addresses"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _PublicHTTPConnectionPool,
+            "https": _PublicHTTPSConnectionPool
+        }
+
+class PDFFetcher:
+    """Downloads PDFs over one pooled HTTP session.
+
+    At most ``per_host`` downloads run against any one host at a time.
+    Connection errors, timeouts and 429/5xx responses are retried up to
+    ``retries`` times with exponential backoff, honouring Retry-After. With
+    a ``cache``, bodies are kept as files with their ETag: a PDF downloaded less
+    than ``fresh_for`` seconds ago is served without a request, and older
+    ones are revalidated with If-None-Match / If-Modified-Since.
+
+    fetch returns bytes; fetch_file streams the body into a temporary file
+    instead, for callers that hold many PDFs at once. A ``guard`` passed to
+    either is checked against the URL and every redirect target before they
+    are requested, and guarded fetches use a separate session whose
+    connections are refused unless they reach a public address.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        per_host: int = 10,
+        pool_size: int = 32,
+        retries: int = 3,
+        backoff: float = 0.5,
+        cache: Optional[FileCache] = None,
+        fresh_for: float = 7 * 24 * 3600
+    ):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.fresh_for = fresh_for
+
+        self.session = _session(HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.public_session = _session(PublicAddressAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="pdf-fetch")
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str, guard: Optional[URLGuard] = None) -> bytes:
+        """Download a PDF (blocking), serving or revalidating a cached copy when there is one"""
+        body = io.BytesIO()
+        self._fetch(url, body, guard)
+        return body.getvalue()
+
+    def fetch_file(self, url: str, directory: Optional[str] = None) -> PDFFile:
+        """Download a PDF into a temporary file (blocking); the caller must remove it"""
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+        try:
+            with os.fdopen(fd, "w+b") as pdf_file:
+                self._fetch(url, pdf_file)
+        except BaseException:
+            os.remove(path)
+            raise
+        return PDFFile(path)
+
+    async def afetch(self, url: str, guard: Optional[URLGuard] = None) -> bytes:
+        """Download a PDF on the fetcher's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, telemetry.in_context(partial(self.fetch, url, guard)))
+
+    async def afetch_file(self, url: str, directory: Optional[str] = None) -> PDFFile:
+        """Download a PDF into a temporary file on the fetcher's thread pool.
+
+        If the caller is cancelled mid-download, the file is removed once the
+        download thread finishes.
+        """
+        loop = asyncio.get_running_loop()
+        download = loop.run_in_executor(self._executor, telemetry.in_context(partial(self.fetch_file, url, directory)))
+        try:
+            return await asyncio.shield(download)
+        except asyncio.CancelledError:
+            download.add_done_callback(_remove_abandoned)
+            raise
+
+    async def afetch_all(self, urls: List[str]) -> List[Union[bytes, Exception]]:
+        """Download PDFs concurrently, returning bytes or the error for each URL in order"""
+        return await asyncio.gather(*(self.afetch(url) for url in urls), return_exceptions=True)
+
+    def _fetch(self, url: str, sink: BinaryIO, guard: Optional[URLGuard] = None):
+        """Write a PDF's body to sink, from the cache or the network"""
+        if guard is not None:
+            guard(url)
+        with telemetry.span("fetch.pdf") as current, self._cached(url) as cached:
+            if cached is not None and time.time() - cached[0]["fetched_at"] < self.fresh_for:
+                shutil.copyfileobj(cached[1], sink)
+                current.set(cache="hit", bytes=sink.tell())
+                return
+
+            headers = {}
+            if cached is not None:
+                if cached[0].get("etag"):
+                    headers["If-None-Match"] = cached[0]["etag"]
+                if cached[0].get("last_modified"):
+                    headers["If-Modified-Since"] = cached[0]["last_modified"]
+            response, size, attempts = self._download(url, headers, sink, guard)
+            current.set(attempts=attempts)
+            if response.status_code == 304 and cached is not None:
+                self.cache.update(url, {**cached[0], "fetched_at": time.time()})
+                shutil.copyfileobj(cached[1], sink)
+                current.set(cache="revalidated", bytes=sink.tell())
+                return
+            self._check(url, response, sink)
+            self._store(url, response, sink)
+            current.set(cache="miss", bytes=size)
+
+    def _download(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        sink: BinaryIO,
+        guard: Optional[URLGuard] = None
+    ) -> Tuple[requests.Response, int, int]:
+        """GET with retries into sink, returning the final response, the body size and the number of attempts.
+
+        The host slot is held while the body downloads but not during backoff.
+        """
+        session, hooks = self.session, None
+        if guard is not None:
+            session, hooks = self.public_session, {"response": partial(_check_redirect, guard)}
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                with self._host_slot(url), session.get(url, headers=headers, timeout=self.timeout, stream=True, hooks=hooks) as response:
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        return response, self._read(url, response, sink), attempt + 1
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = min(float(retry_after), self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise PDFFetchError(f"{url}: {e}") from e
+            time.sleep(delay)
+
+    def _read(self, url: str, response: requests.Response, sink: BinaryIO) -> int:
+        """Copy a response body into sink, replacing any earlier attempt and refusing bodies over max_bytes"""
+        sink.seek(0)
+        sink.truncate()
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise PDFFetchError(f"{url} exceeds the {self.max_bytes} byte limit")
+            sink.write(chunk)
+        return size
+
+    def _check(self, url: str, response: requests.Response, sink: BinaryIO):
+        """Reject error responses and bodies that are not PDFs"""
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise PDFFetchError(str(e)) from e
+        sink.seek(0)
+        if sink.read(4) != b"%PDF":
+            raise PDFFetchError(f"{url} did not return a PDF")
+
+    @contextmanager
+    def _host_slot(self, url: str) -> Iterator[None]:
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+        with slot:
+            yield
+
+    @contextmanager
+    def _cached(self, url: str) -> Iterator[Optional[Tuple[Dict, BinaryIO]]]:
+        """Yield (metadata, open body file) for a cached URL, or None"""
+        cached = self.cache.open(url) if self.cache is not None else None
+        try:
+            yield cached
+        finally:
+            if cached is not None:
+                cached[1].close()
+
+    def _store(self, url: str, response: requests.Response, sink: BinaryIO):
+        if self.cache is None:
+            return
+        sink.seek(0)
+        self.cache.put(url, sink, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        })
+
+def _session(adapter: HTTPAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _check_redirect(guard: URLGuard, response: requests.Response, *args, **kwargs):
+    """Response hook that vets a redirect target before requests follows it"""
+    if response.is_redirect:
+        guard(urljoin(response.url, response.headers["Location"]))
+
+def _remove_abandoned(download: asyncio.Future):
+    if not download.cancelled() and download.exception() is None:
+        os.remove(download.result().path)
+
+@lru_cache()
+def get_pdf_fetcher() -> PDFFetcher:
+    """Process-wide PDF fetcher, caching under VECTOR_DB_PATH when PDF_CACHE_ENABLED"""
+    settings = get_settings()
+    cache = None
+    if settings.PDF_CACHE_ENABLED:
+        cache = FileCache(
+            os.path.join(settings.VECTOR_DB_PATH, "pdf_cache"),
+            max_bytes=settings.PDF_CACHE_MAX_BYTES
+        )
+    return PDFFetcher(
+        timeout=settings.PDF_FETCH_TIMEOUT,
+        max_bytes=settings.PDF_FETCH_MAX_BYTES,
+        per_host=settings.PDF_FETCH_PER_HOST,
+        pool_size=settings.PDF_FETCH_POOL_SIZE,
+        retries=settings.PDF_FETCH_RETRIES,
+        backoff=settings.PDF_FETCH_BACKOFF,
+        cache=cache,
+        fresh_for=settings.PDF_CACHE_FRESH_SECONDS
+    )
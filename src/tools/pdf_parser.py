@@ -1,35 +1,60 @@
-from PyPDF2 import PdfReader
-from typing import Dict, Pattern
-import re
-import io
+from typing import Callable, Dict, List, Optional, Set, Union
+from urllib.parse import urlsplit
 from langchain.tools import BaseTool
-from pydantic import Field
+from .. import telemetry
+from ..config import get_settings
+from .pdf_extraction import PDFSource, get_pdf_pool
+from .pdf_fetcher import check_public_url, get_pdf_fetcher
+from .section_segmenter import segment
 
 class PDFParserTool(BaseTool):
     name = "pdf_parser"
-    description = "Parse PDF content and extract structured information including title, abstract, sections, figures, and references"
-    figures_pattern: Pattern = Field(default_factory=lambda: re.compile(r'Figure \d+:.*?(?=Figure \d+:|$)', re.DOTALL))
-    references_pattern: Pattern = Field(default_factory=lambda: re.compile(r'References.*', re.DOTALL))
+    description = "Parse a PDF, given as a PDF URL such as a search result's pdf_url, and extract structured information including title, abstract, sections, figures, and references"
+    # Returns this run's search results; their hosts may be fetched besides PDF_FETCH_ALLOWED_HOSTS
+    search_results: Optional[Callable[[], List[Dict]]] = None
     
-    def _run(self, pdf_content: bytes) -> Dict:
-        """Parse PDF content and extract structured information"""
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        
-        # Extract text content
-        full_text = ""
-        for page in reader.pages:
-            full_text += page.extract_text()
-        
-        # Extract sections
-        sections = self._extract_sections(full_text)
-        
-        # Extract figures
-        figures = self.figures_pattern.findall(full_text)
-        
-        # Extract references
-        references_match = self.references_pattern.search(full_text)
-        references = references_match.group() if references_match else ""
+    def _run(self, source: Union[PDFSource, str]) -> Dict:
+        """Parse a PDF (bytes, server-owned file or URL) and extract structured information"""
+        if isinstance(source, str):
+            source = get_pdf_fetcher().fetch(_url(source), guard=self._check_url)
+        with telemetry.span("pdf.extract"):
+            full_text = get_pdf_pool().extract_text_sync(source)
+        return self._structure(full_text)
+    
+    async def _arun(self, source: Union[PDFSource, str]) -> Dict:
+        """Async version of parse_pdf"""
+        if isinstance(source, str):
+            source = await get_pdf_fetcher().afetch(_url(source), guard=self._check_url)
+        with telemetry.span("pdf.extract"):
+            full_text = await get_pdf_pool().extract_text(source)
+        return self._structure(full_text)
+    
+    def parse_pdf(self, source: PDFSource) -> Dict:
+        """Parse PDF content, blocking until extraction finishes"""
+        return self._run(source)
+    
+    async def aparse_pdf(self, source: PDFSource) -> Dict:
+        """Parse PDF content with text extraction in the worker pool"""
+        return await self._arun(source)
+    
+    def _check_url(self, url: str):
+        """Only fetch from allowed hosts, never from private or local addresses"""
+        check_public_url(url, self._allowed_hosts())
+    
+    def _allowed_hosts(self) -> Set[str]:
+        hosts = {host.lower() for host in get_settings().PDF_FETCH_ALLOWED_HOSTS}
+        for result in (self.search_results() if self.search_results else []):
+            for key in ("pdf_url", "url"):
+                host = urlsplit(result.get(key) or "").hostname
+                if host:
+                    hosts.add(host.lower())
+        return hosts
+    
+    def _structure(self, full_text: str) -> Dict:
+        """Split extracted text into title, sections, figures and references"""
+        with telemetry.span("pdf.segment", chars=len(full_text)):
+            segments = segment(full_text)
+        sections = segments['sections']
         
         return {
             'title': self._extract_title(full_text),
@@ -38,33 +63,19 @@ class PDFParserTool(BaseTool):
             'methods': sections.get('Methods', ''),
             'results': sections.get('Results', ''),
             'discussion': sections.get('Discussion', ''),
-            'figures': figures,
-            'references': references
+            'figures': segments['figures'],
+            'references': segments['references'],
+            'section_offsets': segments['offsets']
         }
     
-    async def _arun(self, pdf_content: bytes) -> Dict:
-        """Async version of parse_pdf"""
-        return self._run(pdf_content)
-    
-    def _extract_sections(self, text: str) -> Dict[str, str]:
-        """Extract main sections from the paper"""
-        sections = {}
-        section_patterns = {
-            'Abstract': r'Abstract.*?(?=Introduction|$)',
-            'Introduction': r'Introduction.*?(?=Methods|Methodology|$)',
-            'Methods': r'Methods.*?(?=Results|$)',
-            'Results': r'Results.*?(?=Discussion|$)',
-            'Discussion': r'Discussion.*?(?=Conclusion|References|$)'
-        }
-        
-        for section, pattern in section_patterns.items():
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                sections[section] = match.group().strip()
-        
-        return sections
-    
     def _extract_title(self, text: str) -> str:
         """Extract paper title"""
-        first_line = text.split('\n')[0]
-        return first_line.strip()
\ No newline at end of file
+        first_line = text.partition('\n')[0]
+        return first_line.strip()
+
+def _url(source: str) -> str:
+    """Text input is only ever a URL; local paths must come in as PDFFile"""
+    url = source.strip()
+    if not url.startswith(("http://", "https://")):
+        raise ValueError("pdf_parser takes a PDF URL, not a file path")
+    return url
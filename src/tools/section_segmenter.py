@@ -0,0 +1,93 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import re
+
+# Every heading keyword, matched in a single left-to-right scan over the
+# lower-cased text. Leading with a character class lets the regex engine
+# skip quickly over positions that cannot start a heading.
+HEADING_PATTERN = re.compile(
+    r'[aimrdcf](?:bstract|ntroduction|ethodology|ethods|esults|iscussion|onclusion|eferences|igure \d+:)'
+)
+HEADING_PATTERN_IGNORECASE = re.compile(HEADING_PATTERN.pattern, re.IGNORECASE)
+
+# Each section runs from its first heading to the nearest following stop keyword
+SECTION_STOPS = {
+    'Abstract': ('abstract', ('introduction',)),
+    'Introduction': ('introduction', ('methods', 'methodology')),
+    'Methods': ('methods', ('results',)),
+    'Results': ('results', ('discussion',)),
+    'Discussion': ('discussion', ('conclusion', 'references'))
+}
+
+Span = Tuple[int, int]
+
+class SectionIndex:
+    """Heading offsets of a paper, found in one linear scan of its text.
+
+    Sections, figures and references are sliced from this index rather than
+    re-searching the document once per pattern. Offsets are character
+    positions in the text passed in.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}
+        self.figures: List[int] = []
+        self.references: Optional[int] = None
+        
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = HEADING_PATTERN.finditer(lowered)
+        else:
+            # Some characters change length when lower-cased, which would
+            # shift offsets; match case-insensitively on the original instead
+            matches = HEADING_PATTERN_IGNORECASE.finditer(text)
+        
+        for match in matches:
+            start, end = match.span()
+            keyword = match.group().lower()
+            if keyword.startswith('figure'):
+                # Figure captions are case-sensitive
+                if text.startswith('Figure', start):
+                    self.figures.append(start)
+                continue
+            self.positions.setdefault(keyword, []).append((start, end))
+            if self.references is None and text.startswith('References', start):
+                self.references = start
+
+    def section_spans(self) -> Dict[str, Span]:
+        spans = {}
+        for section, (keyword, stops) in SECTION_STOPS.items():
+            occurrences = self.positions.get(keyword)
+            if not occurrences:
+                continue
+            start, heading_end = occurrences[0]
+            end = len(self.text)
+            for stop in stops:
+                stop_starts = [position for position, _ in self.positions.get(stop, [])]
+                index = bisect_left(stop_starts, heading_end)
+                if index < len(stop_starts):
+                    end = min(end, stop_starts[index])
+            spans[section] = (start, end)
+        return spans
+
+    def figure_spans(self) -> List[Span]:
+        ends = self.figures[1:] + [len(self.text)]
+        return list(zip(self.figures, ends))
+
+    def references_span(self) -> Optional[Span]:
+        if self.references is None:
+            return None
+        return (self.references, len(self.text))
+
+def segment(text: str) -> Dict:
+    """Slice a paper into sections, figure captions and references"""
+    index = SectionIndex(text)
+    spans = index.section_spans()
+    references = index.references_span()
+    return {
+        'sections': {name: text[start:end].strip() for name, (start, end) in spans.items()},
+        'figures': [text[start:end] for start, end in index.figure_spans()],
+        'references': text[references[0]:references[1]] if references else "",
+        'offsets': spans
+    }
@@ -1,10 +1,26 @@
-from langchain_community.llms import Ollama
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.tools import BaseTool
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pydantic import Field, PrivateAttr
-import os
+import asyncio
+from .. import telemetry
+from ..config import get_settings
+from ..llm.gateway import PRIORITY_LOW
+from ..llm.langchain_llm import GatewayLLM
+
+# Rough chars-per-token ratio for English prose; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+SUMMARY_HEADINGS = """1. Main findings
+            2. Methodology
+            3. Key contributions
+            4. Limitations
+            5. Future work suggestions"""
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
 
 class SummarizerTool(BaseTool):
     name = "summarizer"
@@ -14,26 +30,15 @@ class SummarizerTool(BaseTool):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        # Get Ollama configuration from environment variables
-        ollama_host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
-        ollama_model = os.getenv('OLLAMA_MODEL', 'gemma')
-        
-        # Using Ollama with configuration from environment variables
-        object.__setattr__(self, '_llm', Ollama(
-            base_url=ollama_host,
-            model=ollama_model
-        ))
+        # Summaries are long generations, scheduled behind planner calls
+        object.__setattr__(self, '_llm', GatewayLLM(priority=PRIORITY_LOW))
         object.__setattr__(self, '_summary_prompt', ChatPromptTemplate.from_template(
             """Summarize the following research paper content:
             
             {content}
             
             Provide a structured summary including:
-            1. Main findings
-            2. Methodology
-            3. Key contributions
-            4. Limitations
-            5. Future work suggestions
+            {headings}
             """
         ))
     
@@ -113,7 +118,12 @@ class SummarizerTool(BaseTool):
         return key_points
     
     async def summarize_paper(self, paper_content: Dict) -> Dict:
-        """Generate a structured summary of a paper"""
+        """Generate a structured summary of a paper
+
+        Content that fits the token budget is summarized in one call. Longer
+        content is split into budget-sized chunks that are summarized
+        concurrently and then merged in rounds, so nothing is truncated.
+        """
         # Combine relevant sections
         content = f"""
         Abstract: {paper_content.get('abstract', '')}
@@ -127,17 +137,132 @@ class SummarizerTool(BaseTool):
         Discussion: {paper_content.get('discussion', '')}
         """
         
-        response = await self._llm.agenerate([
-            self._summary_prompt.format_messages(content=content)
-        ])
+        settings = get_settings()
+        budget = settings.SUMMARY_CHUNK_TOKENS
+        if estimate_tokens(content) <= budget:
+            with telemetry.span("summarizer.summarize", chunks=1):
+                return self._parse_summary(await self._complete(
+                    self._summary_prompt.format(content=content, headings=SUMMARY_HEADINGS)
+                ))
         
-        return self._parse_summary(response.generations[0][0].text)
+        limit = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENCY)
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=budget * CHARS_PER_TOKEN,
+            chunk_overlap=budget * CHARS_PER_TOKEN // 20,
+        )
+        with telemetry.span("summarizer.summarize") as current:
+            chunks = splitter.split_text(content)
+            current.set(chunks=len(chunks))
+            with telemetry.span("summarizer.map"):
+                partials = await asyncio.gather(*(self._summarize_part(chunk, limit) for chunk in chunks))
+            
+            # Merge partial summaries in budget-sized groups until one remains;
+            # each round shrinks the list geometrically
+            rounds = 0
+            while len(partials) > 1:
+                rounds += 1
+                with telemetry.span("summarizer.reduce", round=rounds, parts=len(partials)):
+                    partials = await asyncio.gather(*(
+                        self._merge_parts(group, limit) for group in self._pack(partials, budget)
+                    ))
+        
+        return self._parse_summary(partials[0])
+    
+    async def _complete(self, prompt: str) -> str:
+        response = await self._llm.agenerate([prompt])
+        return response.generations[0][0].text
+    
+    async def _summarize_part(self, chunk: str, limit: asyncio.Semaphore) -> str:
+        """Summarize one chunk of a long paper under the shared headings"""
+        prompt = f"""The following is one part of a longer research paper.
+        Summarize only what this part says, using these headings
+        (leave a heading empty if this part says nothing about it):
+        {SUMMARY_HEADINGS}
+        
+        Paper excerpt:
+        {chunk}
+        """
+        async with limit:
+            return await self._complete(prompt)
+    
+    async def _merge_parts(self, parts: List[str], limit: asyncio.Semaphore) -> str:
+        """Combine partial summaries of the same paper into one"""
+        if len(parts) == 1:
+            return parts[0]
+        
+        joined = "\n---\n".join(parts)
+        prompt = f"""The following are summaries of consecutive parts of the same research paper.
+        Merge them into a single structured summary of the paper, removing repetition.
+        Use exactly these headings:
+        {SUMMARY_HEADINGS}
+        
+        Partial summaries:
+        {joined}
+        """
+        async with limit:
+            return await self._complete(prompt)
     
-    async def compare_papers(self, summaries: List[Dict]) -> str:
-        """Compare multiple paper summaries"""
+    def _pack(self, parts: List[str], budget: int) -> List[List[str]]:
+        """Group consecutive parts so each group fits the token budget.
+
+        Parts over half the budget are split first, so any two pieces fit
+        together and every group but the last merges at least two of them.
+        """
+        half = max(budget // 2, 2)
+        groups = []
+        current, used = [], 0
+        for part in parts:
+            for piece in self._split(part, half):
+                tokens = estimate_tokens(piece)
+                if current and used + tokens > budget:
+                    groups.append(current)
+                    current, used = [], 0
+                current.append(piece)
+                used += tokens
+        
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _split(self, part: str, max_tokens: int) -> List[str]:
+        """Cut a part into consecutive pieces of at most max_tokens"""
+        if estimate_tokens(part) <= max_tokens:
+            return [part]
+        size = (max_tokens - 1) * CHARS_PER_TOKEN
+        return [part[start:start + size] for start in range(0, len(part), size)]
+    
+    async def compare_papers(self, summaries: List[Dict], titles: Optional[List[str]] = None) -> str:
+        """Compare multiple paper summaries
+
+        When the summaries do not fit the token budget together, budget-sized
+        groups of papers are compared concurrently and the group comparisons
+        are then merged in rounds into one.
+        """
+        formatted = self._format_summaries(summaries, titles)
+        settings = get_settings()
+        budget = settings.SUMMARY_CHUNK_TOKENS
+        if estimate_tokens(formatted) <= budget:
+            with telemetry.span("summarizer.compare", papers=len(summaries), groups=1):
+                return await self._compare_group([formatted])
+        
+        limit = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENCY)
+        papers = [
+            self._format_summary(i, summary, titles[i - 1] if titles else None)
+            for i, summary in enumerate(summaries, 1)
+        ]
+        groups = self._pack(papers, budget)
+        with telemetry.span("summarizer.compare", papers=len(summaries), groups=len(groups)):
+            comparisons = await asyncio.gather(*(self._compare_group(group, limit) for group in groups))
+            while len(comparisons) > 1:
+                comparisons = await asyncio.gather(*(
+                    self._merge_comparisons(group, limit) for group in self._pack(comparisons, budget)
+                ))
+        return comparisons[0]
+    
+    async def _compare_group(self, papers: List[str], limit: Optional[asyncio.Semaphore] = None) -> str:
         comparison_prompt = f"""Compare the following research papers:
         
-        {self._format_summaries(summaries)}
+        {"".join(papers)}
         
         Provide:
         1. Common themes
@@ -147,8 +272,31 @@ class SummarizerTool(BaseTool):
         5. Synthesis of insights
         """
         
-        response = await self._llm.agenerate([comparison_prompt])
-        return response.generations[0][0].text
+        if limit is None:
+            return await self._complete(comparison_prompt)
+        async with limit:
+            return await self._complete(comparison_prompt)
+    
+    async def _merge_comparisons(self, comparisons: List[str], limit: asyncio.Semaphore) -> str:
+        """Combine comparisons of disjoint groups of papers into one"""
+        if len(comparisons) == 1:
+            return comparisons[0]
+        
+        joined = "\n---\n".join(comparisons)
+        prompt = f"""The following are comparisons of separate groups of papers from the same literature review.
+        Papers keep their numbers across groups. Merge them into a single comparison of all papers.
+        
+        {joined}
+        
+        Provide:
+        1. Common themes
+        2. Key differences
+        3. Complementary findings
+        4. Research gaps
+        5. Synthesis of insights
+        """
+        async with limit:
+            return await self._complete(prompt)
     
     def _parse_summary(self, summary_text: str) -> Dict:
         """Parse the summary text into structured format"""
@@ -177,13 +325,17 @@ class SummarizerTool(BaseTool):
         
         return sections
     
-    def _format_summaries(self, summaries: List[Dict]) -> str:
+    def _format_summaries(self, summaries: List[Dict], titles: Optional[List[str]] = None) -> str:
         """Format multiple summaries for comparison"""
-        formatted = ""
-        for i, summary in enumerate(summaries, 1):
-            formatted += f"\nPaper {i}:\n"
-            for section, points in summary.items():
-                formatted += f"\n{section.replace('_', ' ').title()}:\n"
-                formatted += "\n".join(f"- {point}" for point in points)
-            formatted += "\n---\n"
+        return "".join(
+            self._format_summary(i, summary, titles[i - 1] if titles else None)
+            for i, summary in enumerate(summaries, 1)
+        )
+    
+    def _format_summary(self, number: int, summary: Dict, title: Optional[str] = None) -> str:
+        formatted = f"\nPaper {number}: {title}\n" if title else f"\nPaper {number}:\n"
+        for section, points in summary.items():
+            formatted += f"\n{section.replace('_', ' ').title()}:\n"
+            formatted += "\n".join(f"- {point}" for point in points)
+        formatted += "\n---\n"
         return formatted
\ No newline at end of file
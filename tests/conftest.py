@@ -0,0 +1,18 @@
+import hashlib
+from typing import List
+import numpy as np
+import pytest
+
+class HashEmbedder:
+    """Deterministic vectors, so tests need no embedding model"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=8).astype("float32").tolist()
+
+@pytest.fixture
+def embedder():
+    return HashEmbedder()
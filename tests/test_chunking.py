@@ -0,0 +1,22 @@
+from typing import List
+from benchmarks.synthetic_pdf import synthetic_paper
+from src.rag.directory_ingestor import DirectoryIngestor
+from src.rag.faiss_store import FaissVectorStore
+from src.rag.ingestion import IngestionPipeline
+
+def stored_hashes(store: FaissVectorStore) -> List[str]:
+    return sorted(document['id'] for document in store.iter_documents())
+
+def test_directory_sync_and_ingest_pdf_store_the_same_chunks(tmp_path, embedder):
+    papers = tmp_path / "papers"
+    papers.mkdir()
+    path = papers / "paper.pdf"
+    path.write_bytes(synthetic_paper(6, seed=3))
+
+    synced = FaissVectorStore()
+    DirectoryIngestor(IngestionPipeline(synced, embedder), str(tmp_path / "manifest.json"), workers=1).sync(str(papers))
+    ingested = FaissVectorStore()
+    IngestionPipeline(ingested, embedder).ingest_pdf(str(path))
+
+    assert len(synced) > 6
+    assert stored_hashes(synced) == stored_hashes(ingested)
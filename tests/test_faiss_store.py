@@ -0,0 +1,46 @@
+from typing import Dict, List
+import pytest
+from src.rag.faiss_store import FaissVectorStore
+
+def chunks(count: int) -> List[Dict]:
+    return [{'text': f"chunk {i}", 'metadata': {'chunk_hash': f"chunk-{i}"}} for i in range(count)]
+
+def filled(embedder, count: int, **options) -> FaissVectorStore:
+    store = FaissVectorStore(index_type="hnsw", hnsw_m=8, **options)
+    documents = chunks(count)
+    store.add_documents(documents, embedder.embed_documents([doc['text'] for doc in documents]))
+    return store
+
+@pytest.mark.parametrize("quantization", ["none", "sq8"])
+def test_hnsw_search_returns_top_k_live_rows_after_deletes(embedder, quantization):
+    store = filled(embedder, 40, quantization=quantization)
+    deleted = [f"chunk-{i}" for i in range(0, 16, 2)]
+
+    store.delete(deleted)
+
+    assert store.index.ntotal == 40
+    for i in range(40):
+        results = store.similarity_search(embedder.embed_query(f"chunk {i}"), top_k=32)
+        assert len(results) == 32
+        assert not {result['id'] for result in results} & set(deleted)
+
+def test_hnsw_graph_is_rebuilt_once_enough_rows_are_deleted(embedder):
+    store = filled(embedder, 20)
+
+    store.delete([f"chunk-{i}" for i in range(10)])
+
+    assert store.index.ntotal == 10
+    results = store.similarity_search(embedder.embed_query("chunk 0"), top_k=5)
+    assert len(results) == 5
+    assert all(int(result['id'].split("-")[1]) >= 10 for result in results)
+    assert len(store.similarity_search(embedder.embed_query("chunk 0"), top_k=20)) == 10
+
+def test_reopened_hnsw_store_still_over_fetches_for_deleted_rows(tmp_path, embedder):
+    store = filled(embedder, 40, persist_directory=str(tmp_path))
+    store.delete(["chunk-0", "chunk-1", "chunk-2"])
+    store.save()
+
+    reopened = FaissVectorStore(str(tmp_path), index_type="hnsw", hnsw_m=8)
+
+    assert reopened.index.ntotal == 40
+    assert len(reopened.similarity_search(embedder.embed_query("chunk 5"), top_k=37)) == 37
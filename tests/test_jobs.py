@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from src.api.jobs import JobQueue, JobQueueFullError
+
+class FakeRun:
+    """Research stand-in that counts executions and finishes when released"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, payload):
+        self.calls.append(payload)
+        await self.release.wait()
+        return {"topic": payload["topic"]}
+
+def test_identical_submissions_share_one_execution():
+    async def scenario():
+        run = FakeRun()
+        jobs = JobQueue(run, workers=2)
+        first, joined_first = jobs.submit({"topic": "graphs"})
+        second, joined_second = jobs.submit({"topic": "graphs"})
+        run.release.set()
+        await asyncio.gather(first.finished.wait(), second.finished.wait())
+        return run, first, second, joined_first, joined_second
+
+    run, first, second, joined_first, joined_second = asyncio.run(scenario())
+
+    assert len(run.calls) == 1
+    assert first is second and (joined_first, joined_second) == (False, True)
+    assert first.status == "succeeded" and first.result == {"topic": "graphs"}
+    assert first.submissions == 2
+
+def test_run_now_joins_and_is_not_limited_by_the_queue():
+    async def scenario():
+        run = FakeRun()
+        jobs = JobQueue(run, workers=1, max_pending=1)
+        jobs.submit({"topic": "a"})
+        await asyncio.sleep(0)
+        jobs.submit({"topic": "b"})
+        with pytest.raises(JobQueueFullError):
+            jobs.submit({"topic": "c"})
+        waiting = [asyncio.ensure_future(jobs.run_now({"topic": "c"})) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert [call["topic"] for call in run.calls] == ["a", "c"]
+        run.release.set()
+        return run, await asyncio.gather(*waiting)
+
+    run, (first, second) = asyncio.run(scenario())
+
+    assert first is second and first.result == {"topic": "c"}
+    assert sorted(call["topic"] for call in run.calls) == ["a", "b", "c"]
+
+def test_finished_jobs_expire_after_the_retention_period():
+    async def scenario():
+        run = FakeRun()
+        run.release.set()
+        jobs = JobQueue(run, retention=0.01)
+        job, _ = jobs.submit({"topic": "graphs"})
+        await job.finished.wait()
+        kept = jobs.get(job.id)
+        await asyncio.sleep(0.02)
+        return job, kept, jobs.get(job.id)
+
+    job, kept, expired = asyncio.run(scenario())
+
+    assert kept is job
+    assert expired is None
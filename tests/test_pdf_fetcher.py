@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from benchmarks.stub_pdf_server import StubPDFServer
+from src.cache import FileCache
+from src.tools.pdf_fetcher import PDFFetchError, PDFFetcher, PDFURLNotAllowedError, check_public_url
+from src.tools.pdf_parser import PDFParserTool
+
+@pytest.fixture
+def cache(tmp_path):
+    return FileCache(str(tmp_path / "pdf_cache"))
+
+def test_failed_requests_are_retried():
+    with StubPDFServer(latency=0, fail_first=2) as server:
+        body = PDFFetcher(retries=3, backoff=0.01).fetch(server.paper_url(1))
+        assert body == server.paper(1)
+        assert server.requests == 3
+
+def test_gives_up_after_the_last_retry():
+    with StubPDFServer(latency=0, fail_first=5) as server:
+        with pytest.raises(PDFFetchError):
+            PDFFetcher(retries=2, backoff=0.01).fetch(server.paper_url(1))
+        assert server.requests == 3
+
+def test_fresh_cache_hits_skip_the_network(cache):
+    with StubPDFServer(latency=0) as server:
+        PDFFetcher(cache=cache).fetch(server.paper_url(1))
+        assert PDFFetcher(cache=cache).fetch(server.paper_url(1)) == server.paper(1)
+        assert server.requests == 1
+
+def test_stale_cache_entries_are_revalidated_with_304(cache):
+    with StubPDFServer(latency=0) as server:
+        PDFFetcher(cache=cache).fetch(server.paper_url(1))
+        assert PDFFetcher(cache=cache, fresh_for=0).fetch(server.paper_url(1)) == server.paper(1)
+        assert server.requests == 2
+        assert server.not_modified == 1
+
+def test_cached_bodies_are_files_evicted_under_the_size_cap(tmp_path):
+    with StubPDFServer(latency=0) as server:
+        cache = FileCache(str(tmp_path / "pdf_cache"), max_bytes=len(server.paper(2)) + len(server.paper(3)))
+        fetcher = PDFFetcher(cache=cache)
+        for i in (1, 2, 3):
+            fetcher.fetch_file(server.paper_url(i), str(tmp_path))
+        assert cache.total_bytes() <= cache.max_bytes
+        assert cache.open(server.paper_url(1)) is None
+        for i in (2, 3):
+            meta, body = cache.open(server.paper_url(i))
+            with body:
+                assert meta["etag"] and body.read() == server.paper(i)
+
+def test_per_host_limit_is_respected():
+    with StubPDFServer(latency=0.05, fail_first=1) as server:
+        fetcher = PDFFetcher(per_host=3, backoff=0.01)
+        urls = [server.paper_url(i) for i in range(12)]
+        results = asyncio.run(fetcher.afetch_all(urls))
+        assert results == [server.paper(i) for i in range(12)]
+        assert 1 < server.peak_concurrency <= 3
+
+def test_bodies_over_the_size_cap_are_refused(tmp_path):
+    with StubPDFServer(latency=0) as server:
+        fetcher = PDFFetcher(max_bytes=len(server.paper(1)) - 1)
+        with pytest.raises(PDFFetchError, match="byte limit"):
+            fetcher.fetch(server.paper_url(1))
+        with pytest.raises(PDFFetchError, match="byte limit"):
+            fetcher.fetch_file(server.paper_url(1), str(tmp_path))
+        assert list(tmp_path.iterdir()) == []
+
+def test_fetch_file_spools_the_body(tmp_path):
+    with StubPDFServer(latency=0) as server:
+        pdf = PDFFetcher().fetch_file(server.paper_url(1), str(tmp_path))
+        with open(pdf.path, "rb") as pdf_file:
+            assert pdf_file.read() == server.paper(1)
+
+def test_hosts_outside_the_allow_list_are_refused():
+    with pytest.raises(PDFURLNotAllowedError):
+        check_public_url("https://example.com/paper.pdf", ["arxiv.org"])
+    with pytest.raises(PDFURLNotAllowedError):
+        check_public_url("file:///etc/passwd", ["arxiv.org"])
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/paper.pdf",
+    "http://localhost/paper.pdf",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.0.0.1/paper.pdf",
+    "http://[::1]/paper.pdf"
+])
+def test_private_and_local_addresses_are_refused(url):
+    with pytest.raises(PDFURLNotAllowedError):
+        check_public_url(url, ["127.0.0.1", "localhost", "169.254.169.254", "10.0.0.1", "::1"])
+
+def test_guarded_fetches_refuse_connections_to_private_addresses():
+    # Stands in for a host that passed the guard and then rebound to 127.0.0.1
+    with StubPDFServer(latency=0) as server:
+        with pytest.raises(PDFURLNotAllowedError, match="non-public address"):
+            PDFFetcher(retries=0).fetch(server.paper_url(1), guard=lambda url: None)
+        assert server.requests == 0
+
+def test_parser_tool_only_fetches_allowed_public_urls():
+    with StubPDFServer(latency=0) as server:
+        url = server.paper_url(1)
+        for tool in (PDFParserTool(), PDFParserTool(search_results=lambda: [{"pdf_url": url}])):
+            with pytest.raises(PDFURLNotAllowedError):
+                tool.run(url)
+        assert server.requests == 0
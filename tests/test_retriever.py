@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+import asyncio
+from src.rag.faiss_store import FaissVectorStore
+from src.rag.ingestion import IngestionPipeline
+from src.rag.retriever import BM25Index, Retriever
+
+TEXTS = [
+    "Transformer models replace recurrence with self-attention.",
+    "Convolutional networks dominate image classification on cifar-10.",
+    "A transformer encoder pretrained on text transfers to many tasks.",
+    "Gradient boosting remains strong on tabular data.",
+    "Graph neural networks pass messages between neighbouring nodes.",
+    "Reinforcement learning agents learn from sparse rewards.",
+    "Diffusion models generate images by iterative denoising.",
+    "Recurrent networks process sequences one step at a time."
+]
+
+def chunk(i: int, text: str) -> Dict:
+    return {'text': text, 'metadata': {'chunk_hash': f"chunk-{i}", 'source': "test"}}
+
+class FixedStore:
+    """Vector store returning a fixed ranking and recording the filter it was given"""
+
+    def __init__(self, ranking: List[Dict]):
+        self.ranking = ranking
+        self.where: Optional[Dict] = None
+
+    def similarity_search(self, query_embedding: List[float], top_k: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        self.where = where
+        return self.ranking[:top_k]
+
+def ingest(embedder, **options) -> Retriever:
+    retriever = Retriever(FaissVectorStore(), embedder.embed_query, **options)
+    IngestionPipeline(retriever, embedder).ingest(chunk(i, text) for i, text in enumerate(TEXTS))
+    return retriever
+
+def test_bm25_ranks_documents_matching_more_and_rarer_terms_first():
+    index = BM25Index()
+    for i, text in enumerate(TEXTS):
+        index.add(f"chunk-{i}", text, {})
+
+    ranked = [doc_id for doc_id, _ in index.search("transformer encoder", top_k=10)]
+
+    assert ranked == ["chunk-2", "chunk-0"]
+    assert index.search("quantum annealing") == []
+
+def test_ranks_are_fused_by_reciprocal_rank():
+    store = FixedStore([
+        {'id': "c", 'text': "c", 'metadata': {}},
+        {'id': "a", 'text': "a", 'metadata': {}},
+        {'id': "d", 'text': "d", 'metadata': {}}
+    ])
+    retriever = Retriever(store, lambda query: [0.0], rrf_k=60)
+    for doc_id, text in (("a", "alpha beta gamma"), ("b", "alpha beta"), ("c", "alpha")):
+        retriever.index.add(doc_id, text, {})
+    retriever.index.search = lambda query, top_k: [("a", 3.0), ("b", 2.0), ("c", 1.0)]
+
+    results = retriever.retrieve("alpha", top_k=4)
+
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert [result['text'] for result in results] == ["alpha beta gamma", "alpha", "alpha beta", "d"]
+    assert results[0]['lexical_rank'] == 1 and results[0]['vector_rank'] == 2
+    assert results[0]['score'] == 1 / 61 + 1 / 62
+    assert store.where is None
+
+def test_prefilter_restricts_vector_search_to_lexical_candidates(embedder):
+    retriever = ingest(embedder, prefilter=True)
+
+    results = asyncio.run(retriever.aretrieve("transformer", top_k=len(TEXTS)))
+
+    assert {result['metadata']['chunk_hash'] for result in results} == {"chunk-0", "chunk-2"}
+    assert all('vector_rank' in result for result in results)
+    assert retriever._candidate_filter(retriever.index.search("transformer", 20)) == {
+        "chunk_hash": {"$in": ["chunk-0", "chunk-2"]}
+    }
+
+def test_without_prefilter_vector_search_covers_every_document(embedder):
+    retriever = ingest(embedder)
+
+    results = retriever.retrieve("transformer", top_k=len(TEXTS))
+
+    assert len(results) == len(TEXTS)
+
+def test_delete_removes_documents_from_both_indexes(embedder):
+    retriever = ingest(embedder)
+
+    retriever.delete(["chunk-0"])
+
+    assert "chunk-0" not in retriever.index.documents
+    assert retriever.existing_ids(["chunk-0", "chunk-2"]) == {"chunk-2"}
+    results = retriever.retrieve("transformer", top_k=len(TEXTS))
+    assert "chunk-0" not in {result['metadata']['chunk_hash'] for result in results}
+    assert len(results) == len(TEXTS) - 1
+
+def test_index_existing_rebuilds_the_lexical_index_from_the_store(embedder):
+    store = ingest(embedder).vector_store
+    retriever = Retriever(store, embedder.embed_query)
+
+    retriever.index_existing()
+
+    assert len(retriever.index) == len(TEXTS)
+    assert [doc_id for doc_id, _ in retriever.index.search("recurrence")] == ["chunk-0"]